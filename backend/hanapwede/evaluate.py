@@ -1,108 +1,156 @@
+"""
+Offline evaluation of recommend_jobs.
+
+Replays every employee's Application rows as ground truth: the jobs a user
+actually applied for are the relevant ones, and the user's top-K ranking is
+scored against them with precision@K, recall@K and NDCG@K. The time spent in
+each ranking stage is recorded as well, so ranking and speed changes can be
+compared on the same data, e.g. a synthetic catalog built with
+`python manage.py generate_synthetic_data --jobs 100000`.
+
+Usage:
+    python evaluate.py --k 5 10 20 --json results.json
+"""
+import argparse
+import json
 import os
+import time
+from collections import defaultdict
+
 import django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hanapwede.settings")
 django.setup()
 
-from hanapwedeApp.models import User, JobPost
-from hanapwedeApp.views import recommend_jobs  
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.metrics import precision_score, recall_score, f1_score
-import json
+import numpy as np
 
-def evaluate_recommendation(user_id):
-    """
-    Evaluate the recommendation accuracy for a given user based on job description similarity & jobs applied.
-    
-    Classification: 
-        # Binary classification (1 = relevant, 0 = irrelevant)
-        # Relevant: If similarity score > threshold
-        # Irrelevant: If similarity score <= threshold
-
-    Parameters:
-        user_id (int): The ID of the user being tested.
-
-        ground_truth_jobs (list): List of job IDs the user actually applied for
-        ground_truth_texts (list): List of job descriptions the user actually applied for
-
-    Returns:
-        results (dict): Precision, recall, and F1-score
-        dict: Precision, recall, and F1-score
-
-        Precision: The proportion of recommended jobs that the user actually applied for
-        Recall: The proportion of jobs the user applied for that were recommended
-        F1-score: The mean/average of precision and recall
-    """
+from hanapwedeApp import recommender
+from hanapwedeApp.instrumentation import latency_summary
+from hanapwedeApp.models import Application, EmployeeProfile
+
+STAGES = ("vectorize", "filter", "sort")
 
 
-    #Retrieve the ground truth job descriptions 
-    ground_truth_jobs = JobPost.objects.filter(post_id__in=[5, 8]) # Static job IDs (testing lng)
-    
-    if not ground_truth_jobs.exists():
-        return {"error": "User has not applied for any jobs."}
-    
-    ground_truth_texts = [
-        (job.job_desc + " " + job.skills_req).strip() if job.skills_req else job.job_desc.strip()
-        for job in ground_truth_jobs
-    ]
-    
-    print("Ground Truth Texts:", ground_truth_texts)
-
-    # kunin recommended jobs
-    response = recommend_jobs(user_id)
-    try:
-        recommended_jobs = json.loads(response.content)
-    except json.JSONDecodeError:
-        return {"error": "Invalid JSON response from recommendation system."}
-    
-
-    recommended_texts = [
-        (job["job_description"] + " " + job["skills_required"]).strip() if job["skills_required"] else job["job_description"].strip()
-        for job in recommended_jobs
-    ]
-    
-    print("Recommended Texts:", recommended_texts)
-
-    # error handling kung meron job desc
-    if not ground_truth_texts or not recommended_texts:
-        return {"error": "Insufficient job descriptions for comparison."}
-
-    #convert yung created text to tf-idf matrix
-    tfidf_vectorizer = TfidfVectorizer(stop_words="english")
-    all_texts = ground_truth_texts + recommended_texts
-    tfidf_matrix = tfidf_vectorizer.fit_transform(all_texts)
-
-    print("TF-IDF Matrix Shape:", tfidf_matrix.shape)
-    
-    ground_truth_vectors = tfidf_matrix[: len(ground_truth_texts)]
-    recommended_vectors = tfidf_matrix[len(ground_truth_texts):]
-
-    print("Ground Truth Vectors Shape:", ground_truth_vectors.shape)
-    print("Recommended Vectors Shape:", recommended_vectors.shape)
-
-    # calculate yung similarity score
-    similarity_scores = cosine_similarity(recommended_vectors, ground_truth_vectors)
-    
-    print("Similarity Scores:\n", similarity_scores)
-
-    # Convert to binary classification: 1 if similar (> threshold), else 0
-    threshold = 0.2  # threshold ng similarity score
-    y_true = [1 if any(sim > threshold for sim in similarity_scores[i]) else 0 for i in range(len(recommended_jobs))]
-    y_pred = [1 if max(sim) > threshold else 0 for sim in similarity_scores]
-
-    print("y_true:", y_true)
-    print("y_pred:", y_pred)
-
-    # compute yung meaningful metrics declared above 
-    precision = precision_score(y_true, y_pred, zero_division=1)
-    recall = recall_score(y_true, y_pred, zero_division=1)
-    f1 = f1_score(y_true, y_pred, zero_division=1)
-
-    return {"precision": precision, "recall": recall, "f1_score": f1}
-
-# Sample with real user ID(19) 
- 
-user_id = 19  
-results = evaluate_recommendation(user_id) #call yung function para makuha na metrics data tas print
-print("Final Results:", results)
+def load_ground_truth():
+    """Applied post_ids per applicant, in one query."""
+    applied = defaultdict(set)
+    for user_id, post_id in Application.objects.filter(
+        applicant__isnull=False, job_post__isnull=False
+    ).values_list("applicant_id", "job_post_id"):
+        applied[user_id].add(post_id)
+    return applied
+
+
+def ranking_metrics(hits, n_relevant, k):
+    """
+    Mean precision, recall and NDCG at `k` over all users.
+
+    `hits` is a (users x max K) boolean matrix, True where the job at that rank
+    was applied for, and `n_relevant` the number of applied jobs per user.
+    """
+    hits = hits[:, :k]
+    n_hits = hits.sum(axis=1)
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    dcg = (hits * discounts).sum(axis=1)
+    idcg = np.cumsum(discounts)[np.minimum(n_relevant, k) - 1]
+    return {
+        "precision": float(np.mean(n_hits / k)),
+        "recall": float(np.mean(n_hits / n_relevant)),
+        "ndcg": float(np.mean(dcg / idcg)),
+    }
+
+
+def rank(job_index, profile, k):
+    """recommend_jobs' top-k rows for one profile, timed per stage."""
+    preferred_tag_names, user_disability, user_skills = profile
+    timings = {}
+
+    start = time.perf_counter()
+    scores = job_index.score(recommender.user_document(*profile))
+    timings["vectorize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    included, _ = recommender.bucket_jobs(
+        job_index.disability_match(user_disability),
+        job_index.skill_match(user_skills),
+        job_index.preference_match(preferred_tag_names),
+    )
+    timings["filter"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    top = recommender.top_rows(scores, included, job_index.post_ids, k)
+    timings["sort"] = time.perf_counter() - start
+    return top, timings
+
+
+def evaluate(ks):
+    max_k = max(ks)
+    latency = {}
+
+    start = time.perf_counter()
+    jobs = recommender.load_job_documents()
+    latency["catalog_load"] = latency_summary([time.perf_counter() - start])
+
+    start = time.perf_counter()
+    job_index = recommender.JobIndex()
+    job_index.upsert(jobs)
+    latency["index_build"] = latency_summary([time.perf_counter() - start])
+
+    applied = load_ground_truth()
+    profiles = recommender.load_profiles(EmployeeProfile.objects.filter(user_id__in=list(applied)))
+    if not profiles or not len(job_index):
+        return {"error": "No applicants with an employee profile, or no jobs to rank."}
+
+    # Top post_ids per user, padded with -1 when fewer than max_k jobs are included.
+    recommended = np.full((len(profiles), max_k), -1, dtype=np.int64)
+    stage_times = {stage: [] for stage in STAGES}
+    for i, (_, profile) in enumerate(profiles):
+        top, timings = rank(job_index, profile, max_k)
+        recommended[i, :len(top)] = job_index.post_ids[top]
+        for stage, seconds in timings.items():
+            stage_times[stage].append(seconds)
+    for stage in STAGES:
+        latency[stage] = latency_summary(stage_times[stage])
+    latency["total"] = latency_summary(np.sum([stage_times[stage] for stage in STAGES], axis=0))
+
+    # (user row, post_id) pairs encoded as one int64 so hits are a single isin().
+    span = int(max(job_index.post_ids.max(), max(max(ids) for ids in applied.values()))) + 1
+    truth = np.array([i * span + post_id for i, (user_id, _) in enumerate(profiles) for post_id in applied[user_id]])
+    rows = np.arange(len(profiles))[:, None]
+    hits = (recommended >= 0) & np.isin(rows * span + recommended, truth)
+    n_relevant = np.array([len(applied[user_id]) for user_id, _ in profiles])
+
+    return {
+        "users": len(profiles),
+        "jobs": len(job_index),
+        "applications": int(n_relevant.sum()),
+        "metrics": {f"@{k}": ranking_metrics(hits, n_relevant, k) for k in ks},
+        "latency": latency,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 20], help="Cut-offs to report")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+    if min(args.k) < 1:
+        parser.error("--k values must be positive")
+
+    results = evaluate(sorted(set(args.k)))
+    if "error" in results:
+        print(results["error"])
+        return
+
+    print(f"{results['users']} user(s), {results['jobs']} job(s), {results['applications']} application(s)")
+    for cutoff, metrics in results["metrics"].items():
+        print(f"{cutoff:>4}  precision {metrics['precision']:.4f}  recall {metrics['recall']:.4f}  ndcg {metrics['ndcg']:.4f}")
+    for stage, summary in results["latency"].items():
+        print(f"{stage:>12}  " + "  ".join(f"{name} {value:.2f}" for name, value in summary.items()))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 
@@ -63,6 +64,7 @@ REST_FRAMEWORK = {
     ],
 }
 MIDDLEWARE = [
+    'hanapwedeApp.instrumentation.InstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -99,13 +101,83 @@ TEMPLATES = [
 ]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Persisted TF-IDF job index used by recommend_jobs (see hanapwedeApp/recommender.py)
+RECOMMENDER_INDEX_DIR = BASE_DIR / 'recommender_index'
+# Per-process LRU of recommend_jobs responses
+RECOMMENDATION_CACHE_SIZE = 1024
+# Serve recommend_jobs from the precompute_recommendations table when it has rows
+# for the user (e.g. during job fairs); the live ranking is the fallback.
+SERVE_PRECOMPUTED_RECOMMENDATIONS = False
+# Per-view query count/DB time/Server-Timing (hanapwedeApp/instrumentation.py),
+# stats at api/admin/request-stats/. Off by default, i-on lang pag nagpo-profile.
+REQUEST_INSTRUMENTATION = False
+REQUEST_STATS_WINDOW_MINUTES = 15
+# OCR jobs (hanapwedeApp/ocr_jobs.py): "process" = pool of OCR_WORKERS processes,
+# "inline" = run in the request thread (tests/dev). OCR_MAX_PENDING bounds the queue.
+OCR_BACKEND = 'process'
+OCR_WORKERS = 2
+OCR_MAX_PENDING = 20
+OCR_JOB_TIMEOUT = 120  # seconds before a pending job is reported as failed
+OCR_JOB_RETENTION = 24 * 60 * 60  # seconds results (may contain ID numbers) are kept
+# Preprocessing before recognition (hanapwedeApp/ocr.py). Images are shrunk to
+# OCR_MAX_SIDE px on their longest side; OCR_THRESHOLD (0-255) binarizes the
+# grayscale image, None keeps it. OCR_ID_NUMBER_REGION is the (left, top, right,
+# bottom) fraction of the card holding the ID number, for callers that only need
+# the number; None (card layouts vary by city) reads the whole card.
+OCR_MAX_SIDE = 1280
+OCR_GRAYSCALE = True
+OCR_THRESHOLD = None
+OCR_ID_NUMBER_REGION = None
+# Recognized texts kept by image content hash, so a re-uploaded card skips OCR.
+OCR_CACHE_MAX_ENTRIES = 5000
+# Images per easyocr inference batch in the admin card check (pwd_card_checks).
+OCR_BATCH_SIZE = 8
+OCR_BATCH_MAX_CARDS = 100  # pending users checked per request
 ASGI_APPLICATION = "hanapwede.asgi.application"
+# ChatConsumer saves messages behind the broadcast, in bulk_create batches of up
+# to CHAT_WRITE_BATCH_SIZE, at least every CHAT_WRITE_INTERVAL seconds.
+CHAT_WRITE_BATCH_SIZE = 50
+CHAT_WRITE_INTERVAL = 0.2
+
+# Chat fan-out (ChatConsumer). The in-memory layer only reaches sockets served by
+# the same daphne process; with several workers set CHANNEL_REDIS_URL (e.g.
+# redis://localhost:6379/0) so they share a Redis-protocol server.
+CHANNEL_REDIS_URL = os.environ.get("CHANNEL_REDIS_URL")
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {"hosts": [CHANNEL_REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",  # for dev, lipat redis for prod
+        }
+    }
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",  # for dev, lipat redis for prod
+# Job catalog snapshot and recommendation versions. With several workers set
+# CACHE_REDIS_URL so they share one cache. The per-process LocMemCache keeps
+# the version counters in the database instead (CacheVersion), and each worker
+# rereads them at most every CACHE_VERSION_TTL seconds, so a job or profile
+# change can take that long to show in the other workers.
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",  # for dev, lipat redis for prod (job catalog snapshot)
+        }
+    }
+CACHE_VERSION_TTL = 2
 
 AUTH_USER_MODEL = 'hanapwedeApp.User'
 
@@ -158,7 +230,6 @@ USE_TZ = True
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
-import os 
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static') 
 
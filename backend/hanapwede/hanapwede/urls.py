@@ -18,7 +18,7 @@ from django.contrib import admin
 from django.contrib.auth import views as auth_views
 from django.urls import path
 from hanapwedeApp.views import signup, login_view,logout_view,employer_profile,post_job, get_tags,save_preferences,recommend_jobs, get_user_preferences
-from hanapwedeApp.views import get_disability_tags,get_job,apply_job,employer_dashboard
+from hanapwedeApp.views import get_disability_tags,get_job,apply_job,employer_dashboard,job_candidates,request_stats
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from hanapwedeApp.views import PostViewSet, CommentViewSet, ReportViewSet, BannedWordViewSet
@@ -26,8 +26,8 @@ from hanapwedeApp.views import edit_profile,get_notifications,mark_notification_
 from hanapwedeApp.views import get_chat_messages, create_chat,send_message,get_user_chats,get_user_details
 from hanapwedeApp.views import get_pending_users,approve_user,reject_user,get_preferences,get_all_jobs,get_all_users,delete_user,approve_application,decline_application
 from hanapwedeApp.views import get_employer_details
-from hanapwedeApp.views import get_pending_users,approve_user,reject_user,get_preferences,get_all_jobs,get_all_users,delete_user,approve_application,decline_application,platform_statistics,admin_login
-from hanapwedeApp.views import get_user_details_redirect, delete_account, ocr_view,job_post_disability_tags, edit_job_post,job_post_tags,delete_job
+from hanapwedeApp.views import get_pending_users,approve_user,reject_user,get_preferences,get_all_jobs,get_all_users,delete_user,approve_application,decline_application,platform_statistics,admin_login,pwd_card_checks
+from hanapwedeApp.views import get_user_details_redirect, delete_account, ocr_view, ocr_result,job_post_disability_tags, edit_job_post,job_post_tags,delete_job
 from hanapwedeApp.views import my_applications, all_reports,cancel_application,delete_application,JobFairJobListView,JobFairViewSet,JobFairRegistrationViewSet,EmployerJobListView,JobListDataView, EmployerJobFairJobListView
 from hanapwedeApp.views import JobFairApplicationsView,UploadPWDCardView,GetPWDCardImage, verify_email
 from hanapwedeApp.views import forgot_password, reset_password,get_all_employers,delete_employer,user_has_profile,get_profile_picture
@@ -60,6 +60,7 @@ urlpatterns = [
     path("api/job/<int:post_id>/", get_job, name="get_job"),
     path("api/submit-application/", apply_job, name="apply_job"),
     path("api/employer-dashboard/", employer_dashboard, name="employer-dashboard"),
+    path("api/job/<int:post_id>/candidates/", job_candidates, name="job_candidates"),
     path("api/edit-profile/", edit_profile,name="edit_profile"),
     path("api/get-notifications/",get_notifications,name="get_notifications"),
     path("api/mark-notification-read/<int:notification_id>/", mark_notification_read, name="mark-notification-read"),
@@ -72,12 +73,14 @@ urlpatterns = [
     path("api/get-user-details/<int:user_id>/", get_user_details, name="get_user_details"),
     path("api/get-employer-details/<int:user_id>/", get_employer_details, name="get_employer_details"), #missing
     path("api/admin/pending-users/",get_pending_users,name="get_pending_users"),
+    path("api/admin/pending-users/card-checks/", pwd_card_checks, name="pwd_card_checks"),
     path("api/admin/approve-user/<int:id>/",approve_user,name="approve_user"),
     path("api/admin/reject-user/<int:id>/",reject_user,name="reject_user"),
     path("api/preferences/", get_preferences, name="get_preferences"),
     path("api/all-jobs/", get_all_jobs, name="get_all_jobs"),
     path("api/all-jobs-public/", get_all_jobs_public, name="get_all_jobs_public"),  
     path("api/admin/users/", get_all_users, name="get_all_users"),
+    path("api/admin/request-stats/", request_stats, name="request_stats"),
     path("api/admin/delete-user/<int:id>/", delete_user, name="delete_user"),
     path("api/delete-account/", delete_account, name="delete_account"),
     path("api/delete-emp-account/", delete_emp_account, name="delete_emp_account"),
@@ -86,6 +89,7 @@ urlpatterns = [
     path("api/platform-statistics/", platform_statistics, name="platform-statistics"),
     path("api/admin-login/", admin_login, name="admin-login"),
     path("api/ocr/", ocr_view, name="ocr"),
+    path("api/ocr/<uuid:job_id>/", ocr_result, name="ocr_result"),
     path('api/jobfairs/<int:job_fair_id>/jobs/', JobFairJobListView.as_view(), name='jobfair-job-list'),
     path('api/jobfairs/<int:job_fair_id>/employer/jobs/', EmployerJobFairJobListView.as_view(), name='jobfair-job-list'),
     path("api/admin/reports/", all_reports, name="all_reports"),
@@ -1,46 +1,178 @@
+import asyncio
 import json
+import logging
 import os
 from channels.generic.websocket import AsyncWebsocketConsumer
-from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
 import django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hanapwede.settings")
 django.setup()
-from hanapwedeApp.models import ChatRooms, Messages, User
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from hanapwedeApp.models import ChatRooms, Messages
+from hanapwedeApp.unread import add_unread, mark_read, room_group_name
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriter:
+    """
+    Write-behind persistence for chat messages. Consumers broadcast first and
+    then add() the message; a background task on the event loop saves what
+    has queued up with bulk_create, every CHAT_WRITE_INTERVAL seconds or as
+    soon as CHAT_WRITE_BATCH_SIZE messages are waiting. flush() saves
+    everything queued so far, in order, and pushes the rooms' new unread
+    counters to their groups.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._loop = None
+        self._task = None
+        self._wakeup = None
+        self._lock = None
+
+    def add(self, message):
+        self._pending.append(message)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._task = loop, None
+            self._wakeup, self._lock = asyncio.Event(), asyncio.Lock()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        if len(self._pending) >= settings.CHAT_WRITE_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def _run(self):
+        # Runs while there is something to save, so an idle process has no task.
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.CHAT_WRITE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Saving chat messages failed; retrying")
+
+    async def flush(self):
+        if self._lock is None:
+            return
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[:settings.CHAT_WRITE_BATCH_SIZE]
+                events = await database_sync_to_async(save_messages)(batch)
+                # Only drop the batch once it is saved; add() may have appended meanwhile.
+                del self._pending[:len(batch)]
+                for event in events:
+                    await get_channel_layer().group_send(room_group_name(event["room_id"]), event)
+
+
+message_writer = MessageWriter()
+
+
+def save_messages(messages):
+    """Save `messages` and count them as unread; returns the chat_unread events."""
+    try:
+        with transaction.atomic():
+            Messages.objects.bulk_create(messages)
+            return add_unread(messages)
+    except IntegrityError:
+        # e.g. a room deleted while its sockets were open; keep the others.
+        events = {}
+        for message in messages:
+            try:
+                with transaction.atomic():
+                    message.save()
+                    for event in add_unread([message]):
+                        events[event["room_id"]] = event
+            except IntegrityError:
+                logger.warning("Dropping chat message for missing room %s or sender %s",
+                               message.room_id, message.sender_id)
+        return list(events.values())
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
+    """
+    Chat over /ws/chat/<room id>/. The user comes from TokenAuthMiddleware;
+    they and their membership of the room are checked once, on connect, and
+    everything they send afterwards is theirs.
+    """
+
     async def connect(self):
+        # Until the membership check passes; disconnect() also runs when it raises.
+        self.is_member = False
         self.room_name = self.scope["url_route"]["kwargs"]["room_name"]
-        self.room_group_name = f"chat_{self.room_name}"
+        self.room_group_name = room_group_name(self.room_name)
+        self.user = self.scope.get("user")
+
+        self.is_member = await self.check_membership()
+        if not self.is_member:
+            # Before accept(), this rejects the handshake (HTTP 403).
+            await self.close()
+            return
 
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
 
+    @database_sync_to_async
+    def check_membership(self):
+        """Whether the connecting user is the room's employee or employer."""
+        if self.user is None or not self.user.is_authenticated or not self.room_name.isdigit():
+            return False
+        return ChatRooms.objects.filter(Q(employee=self.user) | Q(employer=self.user), id=self.room_name).exists()
+
     async def disconnect(self, close_code):
+        if not self.is_member:
+            return
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        # Nothing this socket sent is left unsaved once it has closed.
+        await message_writer.flush()
 
     async def receive(self, text_data):
         data = json.loads(text_data)
+        if data.get("type") == "read":
+            await self.acknowledge_read(data)
+            return
         message = data["message"]
-        sender_username = data["sender"]
-      
-        sender = await sync_to_async(User.objects.get)(username=sender_username)
-        chat_room = await sync_to_async(ChatRooms.objects.get)(id=self.room_name)
-
-   
-        new_message = await sync_to_async(Messages.objects.create)(
-            room=chat_room, sender=sender, content=message
-        )
+        timestamp = timezone.now()
 
-       
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 "type": "chat_message",
                 "message": message,
-                "sender": sender.username,
-                "timestamp": str(new_message.timestamp),
+                "sender": self.user.username,
+                "timestamp": str(timestamp),
             },
         )
+        message_writer.add(Messages(
+            room_id=int(self.room_name), sender_id=self.user.id, content=message, timestamp=timestamp
+        ))
+
+    async def acknowledge_read(self, data):
+        """{"type": "read", "timestamp": newest message seen (default and at most: now)}"""
+        until = None
+        if data.get("timestamp"):
+            try:
+                until = parse_datetime(data["timestamp"])
+            except ValueError:
+                until = None
+            if until is None:
+                return
+            if timezone.is_naive(until):
+                until = timezone.make_aware(until)
+        event = await database_sync_to_async(mark_read)(int(self.room_name), self.user.id, until)
+        if event is not None:
+            await self.channel_layer.group_send(self.room_group_name, event)
 
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps(event))
\ No newline at end of file
+        await self.send(text_data=json.dumps(event))
+
+    async def chat_unread(self, event):
+        await self.send(text_data=json.dumps(event))
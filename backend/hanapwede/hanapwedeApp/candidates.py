@@ -0,0 +1,152 @@
+from operator import itemgetter
+
+import numpy as np
+
+from .catalog import profiles_version
+from .models import EmployeeProfile
+from .recommender import (
+    IndexFile,
+    IndexStore,
+    TermIndex,
+    bucket_jobs,
+    label_matches,
+    load_activated_profiles,
+    skill_phrases,
+    user_document,
+)
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class ProfileIndex(IndexFile):
+    """
+    Raw term counts for every activated EmployeeProfile, the reverse of
+    JobIndex: one job is scored against all profiles.
+
+    Profiles are counted over their own vocabularies. At query time they are
+    projected onto the job index's vocabulary and IDF (TermIndex.project), so
+    a candidate gets exactly the score and colour recommend_jobs would give
+    that job for them. The projections are cached until either index changes.
+    """
+
+    term_indexes = ("text", "preferences", "disabilities", "skills")
+
+    def __init__(self):
+        self.text = TermIndex("text")
+        self.preferences = TermIndex("labels")
+        # One label per profile, "" when the profile has no disability.
+        self.disabilities = TermIndex("labels")
+        self.skills = TermIndex("skills")
+        self._projections = {}
+        self._skill_rows = None
+
+    @property
+    def user_ids(self):
+        return self.text.keys
+
+    def __len__(self):
+        return len(self.text)
+
+    def upsert(self, profiles):
+        profiles = list(profiles)
+        self.remove(user_id for user_id, _ in profiles)
+        user_ids = [user_id for user_id, _ in profiles]
+        self.text.add(user_ids, [user_document(*profile) for _, profile in profiles])
+        self.preferences.add(user_ids, [names for _, (names, _, _) in profiles])
+        self.disabilities.add(user_ids, [[disability or ""] for _, (_, disability, _) in profiles])
+        skills = [(user_id, phrase) for user_id, (_, _, user_skills) in profiles for phrase in skill_phrases(user_skills)]
+        self.skills.add([user_id for user_id, _ in skills], [phrase for _, phrase in skills])
+        self._projections = {}
+        self._skill_rows = None
+
+    def remove(self, user_ids):
+        user_ids = list(user_ids)
+        if user_ids:
+            for name in self.term_indexes:
+                getattr(self, name).remove(user_ids)
+            self._projections = {}
+            self._skill_rows = None
+
+    def _project(self, name, job_terms):
+        """This index's `name` rows weighed with the job index's `job_terms`."""
+        job_tfidf = job_terms.tfidf()
+        cached = self._projections.get(name)
+        if cached is None or cached[0] is not job_tfidf:
+            cached = self._projections[name] = (job_tfidf, job_terms.project(getattr(self, name)))
+        return cached[1]
+
+    @staticmethod
+    def _has_label(labels, job_labels):
+        matches = label_matches(labels.terms, job_labels).astype(np.float64)
+        return (labels.counts @ matches) > 0
+
+    def match(self, job_index, post_id, threshold=0.5):
+        """
+        Similarity score, included mask and colour of every indexed profile
+        for one job of `job_index`, in index row order. Raises KeyError when
+        the job is not indexed.
+        """
+        row = int(job_index.positions([post_id])[0])
+        if row < 0:
+            raise KeyError(post_id)
+
+        job_vector = job_index.text.tfidf()[row]
+        scores = (self._project("text", job_index.text) @ job_vector.T).toarray().ravel()
+
+        job_disabilities = [job_index.disabilities.terms[col] for col in job_index.disabilities.counts[row].indices]
+        # Jobs without disability tags are open to everyone.
+        disability_match = (
+            self._has_label(self.disabilities, job_disabilities) if job_disabilities else np.ones(len(self), dtype=bool)
+        )
+
+        job_tags = [job_index.tags.terms[col] for col in job_index.tags.counts[row].indices]
+        if job_tags:
+            pref_match = self._has_label(self.preferences, job_tags)
+        else:
+            # Untagged jobs match any user who picked at least one preference.
+            pref_match = np.diff(self.preferences.counts.indptr) > 0
+
+        job_skills = job_index.skills.tfidf()[job_index.skills.keys == post_id]
+        best = np.zeros(len(self))
+        if job_skills.shape[0] and len(self.skills):
+            if self._skill_rows is None:
+                self._skill_rows = self.positions(self.skills.keys)
+            similarity = self._project("skills", job_index.skills) @ job_skills.T
+            np.maximum.at(best, self._skill_rows, similarity.max(axis=1).toarray().ravel())
+        skill_match = best > threshold
+
+        included, colors = bucket_jobs(disability_match, skill_match, pref_match)
+        return scores, included, colors
+
+    def positions(self, user_ids):
+        order = np.argsort(self.user_ids)
+        found = np.searchsorted(self.user_ids, user_ids, sorter=order).clip(max=max(len(self) - 1, 0))
+        return order[found]
+
+
+def load_activated_profile_ids():
+    return EmployeeProfile.objects.filter(activated=True).values_list("user_id", flat=True)
+
+
+profile_store = IndexStore(
+    ProfileIndex, "profile_index.npz", load_activated_profiles, itemgetter(0), load_activated_profile_ids,
+    profiles_version,
+)
+
+
+def get_profile_index():
+    return profile_store.get()
+
+
+def get_current_profile_index():
+    """get_profile_index(), checked against the activated profiles once per profiles version."""
+    return profile_store.get_current()
+
+
+def rebuild_profile_index():
+    return profile_store.rebuild()
+
+
+def refresh_profiles(user_ids):
+    profile_store.refresh(user_ids)
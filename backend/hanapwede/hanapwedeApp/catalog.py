@@ -0,0 +1,284 @@
+import base64
+import hashlib
+import json
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+from .models import CacheVersion, JobPost
+
+
+def _names_by_job(through, name_field, job_posts, post_ids):
+    links = through.objects.order_by("id")
+    if job_posts.query.is_sliced:
+        links = links.filter(jobpost_id__in=post_ids)
+    elif job_posts.query.where:
+        links = links.filter(jobpost__in=job_posts.values("post_id"))
+
+    names = defaultdict(list)
+    for post_id, name in links.values_list("jobpost_id", name_field):
+        names[post_id].append(name)
+    return names
+
+
+# Listing field -> JobPost column it is read from. tags/disabilitytag come from
+# their own queries.
+_COLUMNS = {
+    "post_id": "post_id",
+    "job_title": "job_title",
+    "job_description": "job_desc",
+    "skills_required": "skills_req",
+    "comp_name": F("posted_by__employerprofile__comp_name"),
+    "category": "category",
+    "location": "location",
+    "posted_by": "posted_by_id",
+}
+_LABELS = {
+    "tags": (JobPost.tags.through, "tag__name"),
+    "disabilitytag": (JobPost.disabilitytag.through, "disabilitytag__name"),
+}
+CATALOG_FIELDS = [
+    "post_id",
+    "job_title",
+    "job_description",
+    "skills_required",
+    "tags",
+    "disabilitytag",
+    "comp_name",
+    "category",
+    "location",
+    "posted_by",
+]
+
+
+def _listing_value(field, value):
+    if field == "skills_required":
+        return value or ""
+    if field == "comp_name" and value is None:
+        return "Unknown Company"
+    return value
+
+
+def fetch_jobs(job_posts=None, fields=CATALOG_FIELDS):
+    """
+    Job listing rows with tag and disability tag names as lists, fetched in
+    three queries no matter how many jobs there are: one for the jobs joined
+    with their employer profile and one for each tag table. Only the columns
+    and tag tables needed for `fields` are read.
+    """
+    if job_posts is None:
+        job_posts = JobPost.objects.all()
+
+    columns = {field: _COLUMNS[field] for field in fields if field in _COLUMNS}
+    columns["post_id"] = "post_id"
+    jobs = list(job_posts.values(
+        *(column for column in columns.values() if isinstance(column, str)),
+        **{field: column for field, column in columns.items() if not isinstance(column, str)},
+    ))
+    post_ids = [job["post_id"] for job in jobs]
+    labels = {
+        field: _names_by_job(through, name_field, job_posts, post_ids)
+        for field, (through, name_field) in _LABELS.items()
+        if field in fields
+    }
+
+    rows = []
+    for job in jobs:
+        row = {}
+        for field in fields:
+            if field in labels:
+                row[field] = labels[field][job["post_id"]]
+            else:
+                column = columns[field]
+                row[field] = _listing_value(field, job[column if isinstance(column, str) else field])
+        rows.append(row)
+    return rows
+
+
+def load_job_catalog(job_posts=None, fields=CATALOG_FIELDS):
+    """Rows served by recommend_jobs, get_all_jobs and get_all_jobs_public."""
+    jobs = fetch_jobs(job_posts, fields)
+    for job in jobs:
+        for field in _LABELS:
+            if field in job:
+                job[field] = ", ".join(job[field])
+    return jobs
+
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+PAGINATION_PARAMS = ("cursor", "limit", "fields", "category", "location", "disability_tag", "tag")
+
+
+def encode_cursor(job):
+    raw = f"{job['created_at'].isoformat()}|{job['post_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def _ids(values):
+    try:
+        return [int(value) for param in values for value in param.split(",") if value]
+    except ValueError:
+        raise ValueError("Tag filters must be ids.")
+
+
+def paginate_job_catalog(params):
+    """
+    One page of the job listing, newest first, using keyset pagination on
+    (created_at, post_id). Filters are applied in SQL and `fields` limits both
+    the columns read and the keys returned. Raises ValueError on bad input.
+    """
+    fields = CATALOG_FIELDS
+    if params.get("fields"):
+        fields = [field for field in params["fields"].split(",") if field]
+        unknown = set(fields) - set(CATALOG_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    try:
+        limit = min(max(int(params.get("limit", PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("limit must be a number.")
+
+    job_posts = JobPost.objects.order_by("-created_at", "-post_id")
+    if params.get("category"):
+        job_posts = job_posts.filter(category__iexact=params["category"])
+    if params.get("location"):
+        job_posts = job_posts.filter(location__icontains=params["location"])
+    tag_ids = _ids(params.getlist("tag"))
+    if tag_ids:
+        job_posts = job_posts.filter(post_id__in=JobPost.tags.through.objects.filter(
+            tag_id__in=tag_ids).values("jobpost_id"))
+    disability_tag_ids = _ids(params.getlist("disability_tag"))
+    if disability_tag_ids:
+        job_posts = job_posts.filter(post_id__in=JobPost.disabilitytag.through.objects.filter(
+            disabilitytag_id__in=disability_tag_ids).values("jobpost_id"))
+    if params.get("cursor"):
+        created_at, post_id = decode_cursor(params["cursor"])
+        job_posts = job_posts.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, post_id__lt=post_id))
+
+    # One extra row tells us whether there is a next page.
+    page = list(job_posts.values("post_id", "created_at")[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    page = page[:limit]
+
+    jobs = {job["post_id"]: job for job in load_job_catalog(
+        JobPost.objects.filter(post_id__in=[job["post_id"] for job in page]),
+        list(dict.fromkeys(["post_id", *fields])),
+    )}
+    results = [
+        {field: jobs[job["post_id"]][field] for field in fields}
+        for job in page
+        if job["post_id"] in jobs
+    ]
+    return {"results": results, "next_cursor": next_cursor}
+
+
+CATALOG_VERSION_KEY = "job_catalog:version"
+PROFILES_VERSION_KEY = "employee_profiles:version"
+CATALOG_SNAPSHOT_KEY = "job_catalog:snapshot:{}"
+
+CatalogSnapshot = namedtuple("CatalogSnapshot", ["version", "etag", "count", "body"])
+
+_snapshot = None
+
+# Cache backends whose contents only the current process sees.
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def cache_is_shared():
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
+
+
+def cache_version(key):
+    """
+    Counter named `key`, seeded from the clock so versions are not reused
+    after a cache flush or restart. It lives in the cache when every worker
+    shares it; otherwise in CacheVersion, with each process keeping what it
+    read for CACHE_VERSION_TTL seconds.
+    """
+    version = cache.get(key)
+    if version is not None:
+        return version
+    if cache_is_shared():
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+
+    version = CacheVersion.objects.filter(key=key).values_list("version", flat=True).first()
+    if version is None:
+        CacheVersion.objects.bulk_create([CacheVersion(key=key, version=time.time_ns())], ignore_conflicts=True)
+        version = CacheVersion.objects.filter(key=key).values_list("version", flat=True).first()
+    cache.set(key, version, timeout=settings.CACHE_VERSION_TTL)
+    return version
+
+
+def bump_cache_version(key):
+    if cache_is_shared():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+        return
+
+    if not CacheVersion.objects.filter(key=key).update(version=F("version") + 1):
+        CacheVersion.objects.bulk_create([CacheVersion(key=key, version=time.time_ns())], ignore_conflicts=True)
+    # This process sees its own change at once; the others within the TTL.
+    cache.delete(key)
+
+
+def catalog_version():
+    """Bumped whenever anything shown in the job listing changes."""
+    return cache_version(CATALOG_VERSION_KEY)
+
+
+def invalidate_catalog():
+    bump_cache_version(CATALOG_VERSION_KEY)
+
+
+def profiles_version():
+    """Bumped whenever an EmployeeProfile is saved or deleted."""
+    return cache_version(PROFILES_VERSION_KEY)
+
+
+def invalidate_profiles():
+    bump_cache_version(PROFILES_VERSION_KEY)
+
+
+def get_catalog_snapshot():
+    """
+    The full job listing serialized to JSON for the current catalog version.
+    Built at most once per version and process; later requests only read the
+    version (see cache_version()).
+    """
+    global _snapshot
+    version = catalog_version()
+    if _snapshot is not None and _snapshot.version == version:
+        return _snapshot
+
+    key = CATALOG_SNAPSHOT_KEY.format(version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        jobs = load_job_catalog()
+        body = json.dumps(jobs, cls=DjangoJSONEncoder).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        snapshot = CatalogSnapshot(version, etag, len(jobs), body)
+        cache.set(key, snapshot)
+
+    _snapshot = snapshot
+    return snapshot
@@ -0,0 +1,177 @@
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+SLOT_SECONDS = 60
+
+
+def _empty_totals():
+    return {
+        "requests": 0,
+        "queries": 0,
+        "db_ms": 0.0,
+        "serialize_ms": 0.0,
+        "total_ms": 0.0,
+        "bytes": 0,
+        "histogram": [0] * len(BUCKETS_MS),
+    }
+
+
+class RequestStats:
+    """
+    Per-view totals and latency histograms for this process, kept in one slot
+    per minute so only the last `window_minutes` are reported.
+    """
+
+    def __init__(self, window_minutes):
+        self.window_minutes = window_minutes
+        self._slots = deque()
+        self._lock = threading.Lock()
+
+    def record(self, view, queries, db_ms, serialize_ms, total_ms, size):
+        slot_start = int(time.time()) // SLOT_SECONDS * SLOT_SECONDS
+        with self._lock:
+            if not self._slots or self._slots[-1][0] != slot_start:
+                self._slots.append((slot_start, {}))
+                self._expire(slot_start)
+            totals = self._slots[-1][1].setdefault(view, _empty_totals())
+            totals["requests"] += 1
+            totals["queries"] += queries
+            totals["db_ms"] += db_ms
+            totals["serialize_ms"] += serialize_ms
+            totals["total_ms"] += total_ms
+            totals["bytes"] += size
+            totals["histogram"][bisect.bisect_left(BUCKETS_MS, total_ms)] += 1
+
+    def _expire(self, now):
+        while self._slots and self._slots[0][0] <= now - self.window_minutes * SLOT_SECONDS:
+            self._slots.popleft()
+
+    def snapshot(self):
+        """Totals per view over the window, with per-request averages."""
+        merged = {}
+        with self._lock:
+            self._expire(int(time.time()))
+            for _, views in self._slots:
+                for view, totals in views.items():
+                    into = merged.setdefault(view, _empty_totals())
+                    for key, value in totals.items():
+                        if key == "histogram":
+                            into[key] = [a + b for a, b in zip(into[key], value)]
+                        else:
+                            into[key] += value
+
+        for totals in merged.values():
+            n = totals["requests"]
+            totals["avg_queries"] = totals["queries"] / n
+            totals["avg_db_ms"] = totals["db_ms"] / n
+            totals["avg_serialize_ms"] = totals["serialize_ms"] / n
+            totals["avg_total_ms"] = totals["total_ms"] / n
+            totals["avg_bytes"] = totals["bytes"] / n
+            totals["histogram"] = {
+                ("+inf" if bound == float("inf") else f"<={bound}ms"): count
+                for bound, count in zip(BUCKETS_MS, totals["histogram"])
+            }
+        return merged
+
+    def clear(self):
+        with self._lock:
+            self._slots.clear()
+
+
+stats = RequestStats(settings.REQUEST_STATS_WINDOW_MINUTES)
+
+
+def latency_summary(seconds):
+    """Mean and percentiles, in ms, of timings in seconds (benchmark_endpoints, evaluate.py)."""
+    # Imported here: the middleware loads this module and has no use for numpy.
+    import numpy as np
+
+    ms = np.asarray(seconds) * 1000
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+class _RequestTimer:
+    """Query count and DB time of one request, fed by connection.execute_wrapper()."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+
+class InstrumentationMiddleware:
+    """
+    Opt-in (REQUEST_INSTRUMENTATION) per-view query count, DB time,
+    serialization time and response size. Each response gets a Server-Timing
+    header and the totals feed `stats`, served by the request_stats view.
+
+    Serialization time is the rendering of DRF/template responses; views that
+    build a JsonResponse serialize inside the view, which counts as app time.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _RequestTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            request._request_timer = timer
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        db_ms = timer.db_seconds * 1000
+        serialize_ms = timer.serialize_seconds * 1000
+        app_ms = max(total_ms - db_ms - serialize_ms, 0)
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={db_ms:.2f};desc="{timer.queries} queries"',
+            f"ser;dur={serialize_ms:.2f}",
+            f"app;dur={app_ms:.2f}",
+            f"total;dur={total_ms:.2f}",
+        ])
+
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else "<unresolved>"
+        size = 0 if response.streaming else len(response.content)
+        stats.record(view, timer.queries, db_ms, serialize_ms, total_ms, size)
+        return response
+
+    def process_template_response(self, request, response):
+        timer = request._request_timer
+        render = response.render
+
+        def timed_render():
+            start = time.perf_counter()
+            try:
+                return render()
+            finally:
+                timer.serialize_seconds += time.perf_counter() - start
+
+        response.render = timed_render
+        return response
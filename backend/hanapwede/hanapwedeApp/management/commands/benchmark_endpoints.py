@@ -0,0 +1,176 @@
+import io
+import json
+import subprocess
+import tempfile
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from hanapwedeApp import result_cache
+from hanapwedeApp.instrumentation import latency_summary
+from hanapwedeApp.models import User
+
+# (path, who calls it, query parameters for a given user id). "employee" and
+# "employer" routes rotate over --users generated users so per-user caches
+# are not measured as a single hot entry.
+ROUTES = [
+    ("/api/recommend_jobs/", "employee", lambda user_id: {"user_id": user_id}),
+    ("/api/all-jobs-public/", None, None),
+    ("/api/user-chats/", "employee", None),
+    ("/api/get-notifications/", "employee", None),
+    ("/api/posts/", "employee", None),
+    ("/api/employer-dashboard/", "employer", None),
+    ("/api/jobfairs/", "employee", None),
+]
+
+
+def dataset_options(size):
+    """generate_synthetic_data options for a catalog of `size` jobs."""
+    return {
+        "jobs": size,
+        "employers": max(size // 200, 5),
+        "employees": max(size // 10, 20),
+        "chat_rooms": max(size // 20, 10),
+        "posts": max(size // 50, 10),
+        "job_fairs": max(size // 5000, 5),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the hot API routes at several dataset sizes in a throwaway test database and '
+        'reports p50/p95/p99 latency and query counts as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='Job counts to benchmark')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per route first')
+        parser.add_argument('--users', type=int, default=100, help='Users the requests rotate over')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Earlier --output file to check for regressions')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Relative p95 slowdown reported as a regression (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['users'] < 1 or options['warmup'] < 0:
+            raise CommandError('--iterations and --users must be positive, --warmup not negative')
+
+        results = {
+            "revision": git_revision(),
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "iterations": options['iterations'],
+            "sizes": {},
+        }
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with tempfile.TemporaryDirectory() as index_dir, override_settings(RECOMMENDER_INDEX_DIR=index_dir):
+                for size in options['sizes']:
+                    self.stdout.write(f"Dataset with {size} job(s)...")
+                    results["sizes"][str(size)] = self._benchmark_size(size, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self._report(results)
+        if options['output']:
+            with open(options['output'], "w") as f:
+                json.dump(results, f, indent=2)
+        if options['compare']:
+            with open(options['compare']) as f:
+                regressions = self._compare(json.load(f), results, options['threshold'])
+            if regressions:
+                raise CommandError(f"{regressions} regression(s) against {options['compare']}")
+
+    def _benchmark_size(self, size, options):
+        call_command("flush", interactive=False, verbosity=0)
+        cache.clear()
+        result_cache.results.clear()
+        call_command("generate_synthetic_data", seed=options['seed'], stdout=io.StringIO(), **dataset_options(size))
+
+        tokens = {}
+        for user_type in ("Employee", "Employer"):
+            users = list(User.objects.filter(user_type=user_type).order_by("id")[:options['users']])
+            tokens[user_type.lower()] = [Token.objects.get_or_create(user=user)[0] for user in users]
+
+        client = Client()
+        routes = {}
+        for path, caller, params in ROUTES:
+            timings, queries, statuses = [], [], Counter()
+            for i in range(options['warmup'] + options['iterations']):
+                headers, query = {}, {}
+                if caller:
+                    token = tokens[caller][i % len(tokens[caller])]
+                    headers["HTTP_AUTHORIZATION"] = f"Token {token.key}"
+                    if params:
+                        query = params(token.user_id)
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(path, query, **headers)
+                    elapsed = time.perf_counter() - start
+                if i == 0:
+                    first_ms = elapsed * 1000
+                if i >= options['warmup']:
+                    timings.append(elapsed)
+                    queries.append(len(captured))
+                    statuses[response.status_code] += 1
+            routes[path] = {
+                **latency_summary(timings),
+                "first_ms": first_ms,
+                "queries_min": min(queries),
+                "queries_max": max(queries),
+                "bytes": len(response.content),
+                "statuses": {str(code): count for code, count in statuses.items()},
+            }
+        return {"dataset": dataset_options(size), "routes": routes}
+
+    def _report(self, results):
+        for size, result in results["sizes"].items():
+            self.stdout.write(f"\n{size} job(s)")
+            self.stdout.write(f"{'route':<28}{'p50':>9}{'p95':>9}{'p99':>9}{'first':>9}{'queries':>10}")
+            for path, route in result["routes"].items():
+                self.stdout.write(
+                    f"{path:<28}{route['p50_ms']:>9.2f}{route['p95_ms']:>9.2f}{route['p99_ms']:>9.2f}"
+                    f"{route['first_ms']:>9.2f}{route['queries_min']:>6}-{route['queries_max']}"
+                )
+
+    def _compare(self, before, after, threshold):
+        """Print routes that got slower (p95) or run more queries; returns how many."""
+        regressions = 0
+        for size, result in after["sizes"].items():
+            for path, route in result["routes"].items():
+                old = before.get("sizes", {}).get(size, {}).get("routes", {}).get(path)
+                if old is None:
+                    continue
+                slower = route["p95_ms"] > old["p95_ms"] * (1 + threshold) and route["p95_ms"] - old["p95_ms"] > 1
+                more_queries = route["queries_max"] > old["queries_max"]
+                if slower or more_queries:
+                    regressions += 1
+                    self.stdout.write(self.style.WARNING(
+                        f"{size} job(s) {path}: p95 {old['p95_ms']:.2f} -> {route['p95_ms']:.2f} ms, "
+                        f"queries {old['queries_max']} -> {route['queries_max']}"
+                    ))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {before.get('revision') or 'baseline'}"))
+        return regressions
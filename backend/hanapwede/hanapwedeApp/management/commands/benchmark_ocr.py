@@ -0,0 +1,122 @@
+import difflib
+import json
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hanapwedeApp import ocr
+from hanapwedeApp.ocr_jobs import preprocess_options
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+
+
+def pipelines():
+    """
+    Preprocessing variants to compare, as ocr.preprocess() options. "raw" is
+    what ocr_view used to do: the full-resolution upload, in colour.
+    """
+    configured = preprocess_options()
+    variants = {
+        "raw": {},
+        "downscale": {"max_side": settings.OCR_MAX_SIDE},
+        "grayscale": {"max_side": settings.OCR_MAX_SIDE, "grayscale": True},
+        "threshold": {"max_side": settings.OCR_MAX_SIDE, "threshold": settings.OCR_THRESHOLD or 150},
+        "configured": configured,
+    }
+    if settings.OCR_ID_NUMBER_REGION is not None:
+        variants["id_number"] = preprocess_options(id_number_only=True)
+    return variants
+
+
+def normalize_text(text):
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def similarity(text, reference):
+    return difflib.SequenceMatcher(None, normalize_text(text), normalize_text(reference)).ratio()
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs OCR over sample card images with each preprocessing variant and compares time per image, '
+        'pixels fed to the model and text accuracy'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('images', nargs='*', help='Image files or directories (default: MEDIA_ROOT/pwd_cards)')
+        parser.add_argument('--expected', help='JSON file mapping image file names to their expected text')
+        parser.add_argument('--repeat', type=int, default=1, help='Recognitions per image and variant')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        paths = []
+        for arg in options['images'] or [Path(settings.MEDIA_ROOT) / "pwd_cards"]:
+            path = Path(arg)
+            if path.is_dir():
+                paths.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES))
+            else:
+                paths.append(path)
+        if not paths:
+            raise CommandError('No images to benchmark')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be positive')
+
+        expected = {}
+        if options['expected']:
+            with open(options['expected']) as f:
+                expected = json.load(f)
+        images = {path.name: path.read_bytes() for path in paths}
+
+        start = time.perf_counter()
+        reader = ocr.get_reader()
+        self.stdout.write(f"Model loaded in {time.perf_counter() - start:.1f}s; {len(images)} image(s)")
+
+        texts = {}
+        results = {}
+        for name, pipeline in pipelines().items():
+            prepare_seconds = recognize_seconds = pixels = 0
+            texts[name] = {}
+            for image_name, image_bytes in images.items():
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    array = ocr.load_image(image_bytes, **pipeline)
+                    prepared = time.perf_counter()
+                    text = " ".join(reader.readtext(array, detail=0))
+                    prepare_seconds += prepared - start
+                    recognize_seconds += time.perf_counter() - prepared
+                pixels += array.shape[0] * array.shape[1]
+                texts[name][image_name] = text
+
+            runs = len(images) * options['repeat']
+            results[name] = {
+                "options": pipeline,
+                "prepare_ms": prepare_seconds * 1000 / runs,
+                "recognize_ms": recognize_seconds * 1000 / runs,
+                "images_per_second": runs / (prepare_seconds + recognize_seconds),
+                "megapixels": pixels / len(images) / 1e6,
+            }
+
+        # Without --expected, accuracy is agreement with the unprocessed image.
+        for name, result in results.items():
+            scores = [
+                similarity(text, expected.get(image_name, texts["raw"][image_name]))
+                for image_name, text in texts[name].items()
+            ]
+            result["accuracy"] = sum(scores) / len(scores)
+            result["texts"] = texts[name]
+
+        reference = "expected text" if expected else "raw"
+        self.stdout.write(
+            f"{'variant':<12}{'prepare':>10}{'recognize':>11}{'img/s':>8}{'MP':>7}{'accuracy':>10}  (vs {reference})"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<12}{result['prepare_ms']:>10.1f}{result['recognize_ms']:>11.1f}"
+                f"{result['images_per_second']:>8.2f}{result['megapixels']:>7.2f}{result['accuracy']:>10.3f}"
+            )
+        if options['output']:
+            with open(options['output'], "w") as f:
+                json.dump({"images": list(images), "reference": reference, "variants": results}, f, indent=2)
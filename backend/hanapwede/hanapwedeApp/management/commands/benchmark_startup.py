@@ -0,0 +1,91 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Libraries that should only load once a recommendation or OCR job needs them.
+HEAVY_MODULES = ("numpy", "scipy", "sklearn", "pandas", "PIL", "torch", "easyocr")
+
+# What each measured process does after django.setup().
+SCENARIOS = {
+    "setup": "",
+    "urls": "import_module(settings.ROOT_URLCONF)",
+    "asgi": "import_module(settings.ASGI_APPLICATION.rpartition('.')[0])",
+    # Not a startup path: what the first recommend_jobs request now pays.
+    "recommender": "import_module(settings.ROOT_URLCONF); import_module('hanapwedeApp.recommender')",
+}
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from importlib import import_module
+from django.conf import settings
+{body}
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "modules": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_scenario(body):
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+        "PYTHONPATH": os.pathsep.join(path for path in sys.path if path),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(body=body, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+    )
+    if result.returncode:
+        raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class Command(BaseCommand):
+    help = (
+        'Times django.setup(), loading the URLconf and loading the ASGI application in fresh '
+        'processes, and lists which heavy ML libraries each one imports'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Processes started per scenario')
+        parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be positive')
+
+        results = {}
+        for name in options['scenarios']:
+            runs = []
+            for _ in range(options['repeat']):
+                try:
+                    runs.append(run_scenario(SCENARIOS[name]))
+                except CommandError as e:
+                    raise CommandError(f"{name}: {e}")
+            ms = [run["seconds"] * 1000 for run in runs]
+            results[name] = {
+                "median_ms": statistics.median(ms),
+                "min_ms": min(ms),
+                "max_ms": max(ms),
+                "heavy_modules": runs[-1]["modules"],
+            }
+
+        self.stdout.write(f"{'scenario':<14}{'median':>10}{'min':>10}{'max':>10}  heavy modules")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<14}{result['median_ms']:>10.1f}{result['min_ms']:>10.1f}{result['max_ms']:>10.1f}  "
+                f"{', '.join(result['heavy_modules']) or '-'}"
+            )
+        if options['output']:
+            with open(options['output'], "w") as f:
+                json.dump({"repeat": options['repeat'], "scenarios": results}, f, indent=2)
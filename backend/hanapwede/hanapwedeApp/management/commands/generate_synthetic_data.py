@@ -0,0 +1,305 @@
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+
+from hanapwedeApp import candidates, catalog, recommender
+from hanapwedeApp.models import (
+    Application,
+    ChatRooms,
+    Comment,
+    DisabilityTag,
+    EmployeeProfile,
+    EmployerProfile,
+    JobFair,
+    JobPost,
+    Messages,
+    Notification,
+    Post,
+    Tag,
+    User,
+)
+
+# Job categories with the words and skills their posts are written from, so
+# matching and filtering behave like they would on real data.
+CATEGORIES = {
+    "IT": {
+        "titles": ["Web Developer", "IT Support Specialist", "Data Encoder", "QA Tester", "Systems Administrator"],
+        "words": ["software", "computer", "network", "website", "database", "troubleshooting", "remote", "team"],
+        "skills": ["python", "javascript", "sql", "excel", "html", "customer support", "data entry", "networking"],
+    },
+    "Health": {
+        "titles": ["Medical Transcriptionist", "Pharmacy Assistant", "Health Aide", "Clinic Receptionist"],
+        "words": ["patient", "clinic", "records", "care", "hospital", "schedule", "medicine", "wellness"],
+        "skills": ["medical terminology", "first aid", "record keeping", "scheduling", "communication"],
+    },
+    "Education": {
+        "titles": ["Online Tutor", "Sign Language Instructor", "Teacher Aide", "Curriculum Writer"],
+        "words": ["students", "lessons", "teaching", "classroom", "learning", "materials", "school", "online"],
+        "skills": ["teaching", "sign language", "lesson planning", "writing", "public speaking"],
+    },
+    "Sales": {
+        "titles": ["Call Center Agent", "Sales Associate", "Customer Service Representative", "Cashier"],
+        "words": ["customers", "products", "sales", "store", "calls", "targets", "service", "accounts"],
+        "skills": ["customer support", "communication", "negotiation", "cash handling", "english"],
+    },
+    "Design": {
+        "titles": ["Graphic Designer", "Video Editor", "Illustrator", "Social Media Designer"],
+        "words": ["design", "brand", "layout", "visual", "content", "creative", "clients", "portfolio"],
+        "skills": ["photoshop", "illustrator", "video editing", "canva", "drawing"],
+    },
+}
+DISABILITIES = ["Visual", "Hearing", "Mobility", "Speech", "Psychosocial", "Intellectual"]
+LOCATIONS = ["Manila", "Quezon City", "Makati", "Pasig", "Cebu City", "Davao City", "Baguio", "Iloilo City"]
+FIRST_NAMES = ["Juan", "Maria", "Jose", "Ana", "Mark", "Grace", "John", "Liza", "Paolo", "Carmela", "Miguel", "Joy"]
+LAST_NAMES = ["Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza", "Torres", "Flores", "Ramos", "Aquino"]
+APPLICATION_STATUSES = ["Pending", "Pending", "Pending", "Approved", "Declined"]
+
+# Password of every generated user, so load tests can log in as them.
+PASSWORD = "synthetic"
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-generates a large, coherent synthetic dataset (users, profiles, jobs, applications, '
+        'chats, notifications, forum posts, job fairs) for benchmarking. Use on a development database only.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator')
+        parser.add_argument('--prefix', default='synth', help='Username prefix of the generated users')
+        parser.add_argument('--employers', type=int, default=500)
+        parser.add_argument('--employees', type=int, default=10000)
+        parser.add_argument('--jobs', type=int, default=100000)
+        parser.add_argument('--applications-per-employee', type=int, default=5)
+        parser.add_argument('--chat-rooms', type=int, default=5000)
+        parser.add_argument('--messages-per-room', type=int, default=20)
+        parser.add_argument('--notifications-per-user', type=int, default=5)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments-per-post', type=int, default=5)
+        parser.add_argument('--job-fairs', type=int, default=20)
+        parser.add_argument('--jobs-per-fair', type=int, default=20)
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk_create call')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        prefix = options['prefix']
+        if options['employers'] < 1 or options['employees'] < 1 or self.chunk_size < 1:
+            raise CommandError('--employers, --employees and --chunk-size must be positive')
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(f'Users prefixed "{prefix}_" already exist; pick another --prefix')
+
+        tags = self._labels(Tag, list(CATEGORIES))
+        disability_tags = self._labels(DisabilityTag, DISABILITIES)
+
+        employers = self._users(prefix, "employer", "Employer", options['employers'])
+        self._insert(EmployerProfile, (
+            EmployerProfile(
+                user_id=user_id,
+                comp_name=f"{self.rng.choice(LAST_NAMES)} {self.rng.choice(['Inc.', 'Corp.', 'Solutions', 'Services'])} {i}",
+                industry=self.rng.choice(list(CATEGORIES)),
+                location=self.rng.choice(LOCATIONS),
+            )
+            for i, user_id in enumerate(employers)
+        ))
+
+        employees = self._users(prefix, "employee", "Employee", options['employees'])
+        employee_categories = {user_id: self.rng.choice(list(CATEGORIES)) for user_id in employees}
+        self._insert(EmployeeProfile, (self._employee_profile(user_id, employee_categories[user_id]) for user_id in employees))
+        self._insert(User.preferences.through, (
+            User.preferences.through(user_id=user_id, tag_id=tag_id)
+            for user_id in employees
+            for tag_id in self._pick_labels(tags, employee_categories[user_id])
+        ))
+
+        job_categories = [self.rng.choice(list(CATEGORIES)) for _ in range(options['jobs'])]
+        jobs = self._insert(JobPost, (self._job(employers, category) for category in job_categories))
+        self._insert(JobPost.tags.through, (
+            JobPost.tags.through(jobpost_id=post_id, tag_id=tag_id)
+            for post_id, category in zip(jobs, job_categories)
+            for tag_id in self._pick_labels(tags, category)
+        ))
+        self._insert(JobPost.disabilitytag.through, (
+            JobPost.disabilitytag.through(jobpost_id=post_id, disabilitytag_id=tag_id)
+            for post_id in jobs
+            for tag_id in self.rng.sample(list(disability_tags.values()), self.rng.randint(0, 2))
+        ))
+
+        jobs_by_category = {category: [] for category in CATEGORIES}
+        for post_id, category in zip(jobs, job_categories):
+            jobs_by_category[category].append(post_id)
+        self._insert(Application, self._applications(
+            employees, employee_categories, jobs, jobs_by_category, options['applications_per_employee']
+        ))
+
+        pairs = [(self.rng.choice(employees), self.rng.choice(employers)) for _ in range(options['chat_rooms'])]
+        rooms = self._insert(ChatRooms, (
+            ChatRooms(employee_id=employee_id, employer_id=employer_id) for employee_id, employer_id in pairs
+        ))
+        self._insert(Messages, (
+            Messages(room_id=room_id, sender_id=pair[n % 2], content=self._chat_line())
+            for room_id, pair in zip(rooms, pairs)
+            for n in range(options['messages_per_room'])
+        ))
+
+        self._insert(Notification, (
+            Notification(
+                recipient_id=user_id,
+                title=self.rng.choice(["New Job Application", "Application Approved", "Profile Updated", "New Message"]),
+                action="Synthetic notification.",
+                is_read=self.rng.random() < 0.6,
+            )
+            for user_id in employers + employees
+            for _ in range(options['notifications_per_user'])
+        ))
+
+        users = employers + employees
+        posts = self._insert(Post, (
+            Post(
+                user_id=self.rng.choice(users),
+                title=self.rng.choice(CATEGORIES[category]["titles"]) + " tips",
+                content=self._sentence(category, 20, 60),
+            )
+            for category in (self.rng.choice(list(CATEGORIES)) for _ in range(options['posts']))
+        ))
+        self._insert(Comment, (
+            Comment(post_id=post_id, user_id=self.rng.choice(users), content=self._chat_line())
+            for post_id in posts
+            for _ in range(self.rng.randint(0, 2 * options['comments_per_post']))
+        ))
+
+        fairs = self._insert(JobFair, (
+            JobFair(
+                title=f"{self.rng.choice(LOCATIONS)} Inclusive Job Fair {i}",
+                description=self._sentence(self.rng.choice(list(CATEGORIES)), 10, 30),
+                date=timezone.localdate() + timedelta(days=self.rng.randint(1, 180)),
+                contact_number="09171234567",
+                email=f"jobfair{i}@example.com",
+                organizer_id=self.rng.choice(employers),
+            )
+            for i in range(options['job_fairs'])
+        ))
+        self._insert(JobFair.jobs.through, (
+            JobFair.jobs.through(jobfair_id=fair_id, jobpost_id=post_id)
+            for fair_id in fairs
+            for post_id in self.rng.sample(jobs, min(options['jobs_per_fair'], len(jobs)))
+        ))
+
+        # bulk_create skips the signals that keep these up to date.
+        self.stdout.write("Rebuilding the recommendation indexes...")
+        recommender.rebuild_job_index()
+        candidates.rebuild_profile_index()
+        catalog.invalidate_catalog()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(employers)} employer(s), {len(employees)} employee(s), {len(jobs)} job post(s), "
+            f"{len(rooms)} chat room(s), {len(posts)} forum post(s) and {len(fairs)} job fair(s) "
+            f"(seed {options['seed']})"
+        ))
+
+    def _insert(self, model, rows):
+        """
+        bulk_create `rows` in chunks and return the new primary keys in order.
+        MySQL does not hand generated keys back from bulk_create, so they are
+        read back as the keys above the previous maximum; the command must be
+        the only writer while it runs.
+        """
+        last_pk = model.objects.aggregate(last=Max("pk"))["last"] or 0
+        created = 0
+        for chunk in _chunks(rows, self.chunk_size):
+            model.objects.bulk_create(chunk)
+            created += len(chunk)
+        self.stdout.write(f"  {model._meta.object_name}: {created} row(s)")
+        return list(model.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True))
+
+    def _labels(self, model, names):
+        """Ids of the tags named `names`, created if missing."""
+        for name in names:
+            model.objects.get_or_create(name=name)
+        return dict(model.objects.filter(name__in=names).values_list("name", "id"))
+
+    def _pick_labels(self, tags, category):
+        """The category's tag, sometimes with a second random one."""
+        picked = {tags[category]}
+        if self.rng.random() < 0.3:
+            picked.add(self.rng.choice(list(tags.values())))
+        return picked
+
+    def _users(self, prefix, kind, user_type, count):
+        password = make_password(PASSWORD)
+        joined = timezone.now()
+        return self._insert(User, (
+            User(
+                username=f"{prefix}_{kind}_{i}",
+                email=f"{prefix}_{kind}_{i}@example.com",
+                password=password,
+                user_type=user_type,
+                is_email_verified=True,
+                date_joined=joined,
+            )
+            for i in range(count)
+        ))
+
+    def _sentence(self, category, shortest, longest):
+        return " ".join(self.rng.choices(CATEGORIES[category]["words"], k=self.rng.randint(shortest, longest)))
+
+    def _chat_line(self):
+        return self._sentence(self.rng.choice(list(CATEGORIES)), 5, 25)
+
+    def _skills(self, category):
+        skills = CATEGORIES[category]["skills"]
+        return ", ".join(self.rng.sample(skills, self.rng.randint(1, min(4, len(skills)))))
+
+    def _employee_profile(self, user_id, category):
+        return EmployeeProfile(
+            user_id=user_id,
+            full_name=f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+            role=self.rng.choice(CATEGORIES[category]["titles"]),
+            skills=self._skills(category),
+            user_disability=self.rng.choice(DISABILITIES),
+            location=self.rng.choice(LOCATIONS),
+            activated=self.rng.random() < 0.9,
+        )
+
+    def _job(self, employers, category):
+        return JobPost(
+            posted_by_id=self.rng.choice(employers),
+            job_title=self.rng.choice(CATEGORIES[category]["titles"]),
+            job_desc=self._sentence(category, 15, 60),
+            job_type=self.rng.choice(["Full-time", "Part-time"]),
+            category=category,
+            location=self.rng.choice(LOCATIONS),
+            skills_req=self._skills(category),
+            created_at=timezone.now() - timedelta(minutes=self.rng.randint(0, 365 * 24 * 60)),
+        )
+
+    def _applications(self, employees, employee_categories, jobs, jobs_by_category, per_employee):
+        """Applications mostly to jobs in the employee's own category."""
+        for user_id in employees:
+            category = employee_categories[user_id]
+            count = min(self.rng.randint(0, 2 * per_employee), len(jobs))
+            applied = set()
+            while len(applied) < count:
+                pool = jobs_by_category[category] if self.rng.random() < 0.8 and jobs_by_category[category] else jobs
+                applied.add(self.rng.choice(pool))
+            for post_id in applied:
+                yield Application(
+                    applicant_id=user_id,
+                    job_post_id=post_id,
+                    application_status=self.rng.choice(APPLICATION_STATUSES),
+                    applicant_name=f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                    applicant_role=self.rng.choice(CATEGORIES[category]["titles"]),
+                    applicant_skills=self._skills(category),
+                    applicant_location=self.rng.choice(LOCATIONS),
+                )
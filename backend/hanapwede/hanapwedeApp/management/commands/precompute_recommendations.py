@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+# Workers may be spawned (Windows/macOS), so this module must import without
+# the app registry being ready; hanapwedeApp modules are imported lazily.
+_worker_index = None
+
+
+def _init_worker(path):
+    global _worker_index
+    django.setup()
+    from hanapwedeApp.recommender import JobIndex
+    _worker_index = JobIndex.load(path)
+
+
+def _rank_batch(profiles, top_k):
+    from hanapwedeApp.recommender import rank_profiles
+    return rank_profiles(_worker_index, profiles, top_k)
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = 'Stores the top-K recommend_jobs ranking of every activated EmployeeProfile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=50, help='Jobs stored per user')
+        parser.add_argument('--batch-size', type=int, default=200, help='Profiles scored per matrix product')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes; 1 scores everything in this process')
+
+    def handle(self, *args, **options):
+        from hanapwedeApp import recommender
+        from hanapwedeApp.models import JobRecommendation
+
+        top_k, batch_size, workers = options['top_k'], options['batch_size'], options['workers']
+        if top_k < 1 or batch_size < 1 or workers < 1:
+            raise CommandError('--top-k, --batch-size and --workers must be positive')
+
+        # Makes sure the index file exists and is current before workers load it.
+        index = recommender.get_current_job_index()
+        profiles = recommender.load_activated_profiles()
+        batches = list(_batches(profiles, batch_size))
+
+        if workers == 1 or len(batches) <= 1:
+            rankings = (recommender.rank_profiles(index, [p for _, p in batch], top_k) for batch in batches)
+            self._store(JobRecommendation, batches, rankings)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(batches)),
+                initializer=_init_worker,
+                initargs=(str(recommender.index_path()),),
+            ) as pool:
+                rankings = pool.map(_rank_batch, ([p for _, p in batch] for batch in batches),
+                                    [top_k] * len(batches))
+                self._store(JobRecommendation, batches, rankings)
+
+        # Profiles that were deactivated since the last run keep no stale rows.
+        JobRecommendation.objects.exclude(user__employeeprofile__activated=True).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored top {top_k} recommendation(s) for {len(profiles)} profile(s) "
+            f"against {len(index)} job post(s)"
+        ))
+
+    def _store(self, model, batches, rankings):
+        computed_at = timezone.now()
+        for batch, batch_rankings in zip(batches, rankings):
+            user_ids = [user_id for user_id, _ in batch]
+            with transaction.atomic():
+                model.objects.filter(user_id__in=user_ids).delete()
+                model.objects.bulk_create(
+                    model(
+                        user_id=user_id,
+                        job_post_id=post_id,
+                        rank=rank,
+                        similarity_score=score,
+                        color=color,
+                        computed_at=computed_at,
+                    )
+                    for user_id, ranking in zip(user_ids, batch_rankings)
+                    for rank, (post_id, score, color) in enumerate(ranking, start=1)
+                )
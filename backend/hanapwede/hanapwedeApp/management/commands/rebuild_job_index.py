@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from hanapwedeApp import candidates, recommender
+
+
+class Command(BaseCommand):
+    help = 'Refits the persisted job index (recommend_jobs) and profile index (job_candidates) from the DB'
+
+    def handle(self, *args, **kwargs):
+        index = recommender.rebuild_job_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index)} job post(s) into {recommender.index_path()}"
+        ))
+        profiles = candidates.rebuild_profile_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(profiles)} employee profile(s) into {candidates.profile_store.path()}"
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanapwedeApp', '0030_alter_notification_action'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['created_at', 'post_id'], name='hanapwedeAp_created_106b3b_idx'),
+        ),
+    ]
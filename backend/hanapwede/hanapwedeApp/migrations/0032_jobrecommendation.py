@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanapwedeApp', '0031_jobpost_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('similarity_score', models.FloatField()),
+                ('color', models.CharField(max_length=20)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job_post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='hanapwedeApp.jobpost')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_recommendations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'rank'],
+                'unique_together': {('user', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanapwedeApp', '0034_ocrresult'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='messages',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
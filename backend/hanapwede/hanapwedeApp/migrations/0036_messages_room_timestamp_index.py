@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanapwedeApp', '0035_messages_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='messages',
+            index=models.Index(fields=['room', 'timestamp'], name='hanapwedeAp_room_id_e78d84_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:53
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_existing_rooms_read(apps, schema_editor):
+    # Without unread tracking so far, start every existing conversation as read.
+    ChatRooms = apps.get_model('hanapwedeApp', 'ChatRooms')
+    now = timezone.now()
+    ChatRooms.objects.update(employee_read_at=now, employer_read_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanapwedeApp', '0036_messages_room_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatrooms',
+            name='employee_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatrooms',
+            name='employee_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatrooms',
+            name='employer_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatrooms',
+            name='employer_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(mark_existing_rooms_read, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils.timezone import now 
@@ -94,6 +96,12 @@ class JobPost(models.Model):
     tags = models.ManyToManyField(Tag, blank=True) 
     created_at = models.DateTimeField(default=now, editable=False)
 
+    class Meta:
+        indexes = [
+            # keyset pagination of the job listing (newest first)
+            models.Index(fields=["created_at", "post_id"]),
+        ]
+
     def get_company_name(self):
         """Fetch company name from EmployerProfile if it exists."""
         employer_profile = EmployerProfile.objects.filter(user=self.posted_by).first()
@@ -141,6 +149,25 @@ class Application(models.Model):
 
     def __str__(self):
         return f"{self.applicant_name} - {self.applicant_role} (Applied for {self.job_post.job_title})"
+
+
+class JobRecommendation(models.Model):
+    """Top-K recommend_jobs ranking stored by the precompute_recommendations command."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="job_recommendations")
+    job_post = models.ForeignKey(JobPost, on_delete=models.CASCADE, related_name="recommendations")
+    rank = models.PositiveIntegerField()
+    similarity_score = models.FloatField()
+    color = models.CharField(max_length=20)
+    computed_at = models.DateTimeField(default=now)
+
+    class Meta:
+        ordering = ["user", "rank"]
+        unique_together = ("user", "rank")
+
+    def __str__(self):
+        return f"{self.user} #{self.rank}: {self.job_post_id}"
+
+
 class Announcement(models.Model):
     announcement_id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=100)
@@ -235,6 +262,11 @@ class ChatRooms(models.Model):
     employee = models.ForeignKey(User, related_name="employee_chats", on_delete=models.CASCADE)
     employer = models.ForeignKey(User, related_name="employer_chats", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Read cursors and unread counters of both participants; see unread.py.
+    employee_read_at = models.DateTimeField(null=True, blank=True)
+    employer_read_at = models.DateTimeField(null=True, blank=True)
+    employee_unread = models.PositiveIntegerField(default=0)
+    employer_unread = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"Chat between {self.employee.username} and {self.employer.username}"
@@ -243,7 +275,14 @@ class Messages(models.Model):
     room = models.ForeignKey(ChatRooms, related_name="messages", on_delete=models.CASCADE)
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set by ChatConsumer when the message is broadcast; it is saved later.
+    timestamp = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            # keyset pagination of a chat room's history (get_chat_messages)
+            models.Index(fields=["room", "timestamp"]),
+        ]
 
     def __str__(self):
         return f"Messages from {self.sender.username}"
@@ -301,4 +340,49 @@ User = get_user_model()
 class PWDCard(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     image = models.ImageField(upload_to='pwd_cards/')
-    uploaded_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+
+class OCRJob(models.Model):
+    """One queued ocr_view recognition; the client polls it by id."""
+    STATUSES = (
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    text = models.TextField(blank=True, default='')
+    error = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"OCR job {self.id} ({self.status})"
+
+
+class OCRResult(models.Model):
+    """
+    Recognized text of an image, keyed by a hash of its bytes and the
+    preprocessing options (ocr_jobs.content_key()), so re-uploads skip OCR.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    text = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"OCR result {self.key[:12]}"
+
+
+class CacheVersion(models.Model):
+    """
+    Version counters (job catalog, per-user profiles) for when the cache is
+    per-process, so a bump made by one worker reaches all of them; see
+    catalog.cache_version().
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.key} = {self.version}"
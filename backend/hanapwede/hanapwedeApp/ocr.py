@@ -0,0 +1,119 @@
+"""
+Text recognition for uploaded PWD card images.
+
+This module runs inside the OCR worker processes, so it must not import
+Django models, and easyocr (with its model) is only loaded on first use,
+once per worker. Preprocessing options come from the caller (see
+ocr_jobs.preprocess_options()), not from settings.
+"""
+import io
+import re
+
+# PWD IDs are ID-1 cards (ISO/IEC 7810); batched images are resized to this shape.
+CARD_ASPECT = 85.6 / 53.98
+
+_reader = None
+
+
+def get_reader():
+    global _reader
+    if _reader is None:
+        import easyocr
+        _reader = easyocr.Reader(["en"])  # Load English model
+    return _reader
+
+
+def preprocess(image, max_side=None, grayscale=False, threshold=None, region=None):
+    """
+    Prepare a PIL image for recognition: apply the EXIF orientation, crop to
+    `region` ((left, top, right, bottom) as fractions of the card), shrink so
+    the longest side is at most `max_side` pixels, and optionally convert to
+    autocontrasted grayscale, binarized at `threshold` (0-255).
+    """
+    from PIL import Image, ImageOps
+
+    if max_side and region is None:
+        # Lets the JPEG decoder skip most of a phone photo's pixels.
+        image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode in ("RGBA", "LA", "P"):
+        # Transparent areas would otherwise turn black.
+        image = image.convert("RGBA")
+        image = Image.alpha_composite(Image.new("RGBA", image.size, "white"), image)
+    image = image.convert("RGB")
+
+    if region is not None:
+        width, height = image.size
+        left, top, right, bottom = region
+        image = image.crop((round(left * width), round(top * height), round(right * width), round(bottom * height)))
+    if max_side and max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    if grayscale or threshold is not None:
+        image = ImageOps.autocontrast(ImageOps.grayscale(image))
+        if threshold is not None:
+            image = image.point(lambda value: 255 if value >= threshold else 0)
+    return image
+
+
+def load_image(image_bytes, **options):
+    """The image as an array for easyocr; `options` go to preprocess()."""
+    import numpy as np
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(image_bytes))
+    if options:
+        image = preprocess(image, **options)
+    return np.array(image)
+
+
+def recognize(image_bytes, **options):
+    """Text found in the image, joined with spaces."""
+    return " ".join(get_reader().readtext(load_image(image_bytes, **options), detail=0))
+
+
+def batch_shape(max_side=None, region=None, **options):
+    """(width, height) every image of a recognize_many() batch is resized to."""
+    max_side = max_side or 1280
+    left, top, right, bottom = region or (0, 0, 1, 1)
+    aspect = CARD_ASPECT * (right - left) / (bottom - top)
+    if aspect >= 1:
+        return max_side, round(max_side / aspect)
+    return round(max_side * aspect), max_side
+
+
+def recognize_many(images, batch_size=8, **options):
+    """
+    recognize() for a list of image bytes, run through the model in batches
+    of `batch_size`. Gives None for images that cannot be decoded.
+    """
+    if len(images) == 1:
+        return [recognize(images[0], **options)]
+
+    arrays = []
+    for image_bytes in images:
+        try:
+            arrays.append(load_image(image_bytes, **options))
+        except (OSError, ValueError):
+            arrays.append(None)
+    readable = [array for array in arrays if array is not None]
+    if not readable:
+        return [None] * len(images)
+
+    width, height = batch_shape(**options)
+    found = iter(get_reader().readtext_batched(
+        readable, n_width=width, n_height=height, batch_size=batch_size, detail=0
+    ))
+    return [None if array is None else " ".join(next(found)) for array in arrays]
+
+
+def id_numbers(text):
+    """Digit runs in `text` long enough to be an ID number, without separators."""
+    return [re.sub(r"\D", "", match) for match in re.findall(r"\d[\d\s-]{4,}\d", text)]
+
+
+def matches_id(id_no, text):
+    """Whether the digits of `id_no` appear among the ID numbers read from `text`."""
+    digits = re.sub(r"\D", "", id_no or "")
+    return len(digits) >= 4 and any(digits in found for found in id_numbers(text))
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import ocr
+from .models import OCRJob, OCRResult
+
+
+class QueueFull(Exception):
+    pass
+
+
+class WorkersUnavailable(Exception):
+    """The OCR worker pool died; the next job starts a new one."""
+
+
+class OCRQueue:
+    """
+    Runs OCR jobs off the request path, at most OCR_MAX_PENDING at a time.
+
+    With OCR_BACKEND = "process" jobs run in a pool of OCR_WORKERS spawned
+    processes, each loading the easyocr model once, on its first job.
+    "inline" runs them in the calling thread instead (tests, small dev boxes).
+    Either way the result is written to the job's OCRJob row. When a worker
+    process dies the pool is broken: its jobs are marked failed and the pool
+    is replaced on the next job.
+
+    Images already in the OCRResult cache are answered without queuing: the
+    job is created as done and does not count against OCR_MAX_PENDING. An
+    image this process is still recognizing gets the job already running.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._in_flight = {}
+
+    def _start(self):
+        with self._lock:
+            if self._slots is None:
+                self._slots = threading.BoundedSemaphore(settings.OCR_MAX_PENDING)
+            if self._executor is None and settings.OCR_BACKEND == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.OCR_WORKERS,
+                    # Forking a threaded ASGI server is unsafe; ocr.py is spawn-safe.
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Drop a broken pool, unless another thread already replaced it."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _known_job(self, key):
+        """Done job for a cached image, the running job for one in flight, or None."""
+        text = cached_text(key)
+        if text is not None:
+            return OCRJob.objects.create(status="done", text=text, finished_at=timezone.now())
+        with self._lock:
+            job_id = self._in_flight.get(key)
+        return OCRJob.objects.filter(pk=job_id).first() if job_id else None
+
+    def _run(self, keys, fn, *args, **kwargs):
+        """
+        Start fn(*args, **kwargs) in one queue slot, with a pending OCRJob for
+        each of `keys`; its result goes to _finish(). Returns the jobs. Raises
+        WorkersUnavailable, with the jobs marked failed, when the pool is broken.
+        """
+        executor = self._start()
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull
+        try:
+            jobs = [OCRJob.objects.create() for _ in keys]
+            with self._lock:
+                self._in_flight.update((key, job.pk) for key, job in zip(keys, jobs))
+            if executor is not None:
+                try:
+                    future = executor.submit(fn, *args, **kwargs)
+                except BrokenProcessPool:
+                    self._discard_executor(executor)
+                    OCRJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                        status="failed", error="OCR workers unavailable", finished_at=timezone.now()
+                    )
+                    raise WorkersUnavailable
+            else:
+                future = Future()
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+        except BaseException:
+            with self._lock:
+                for key in keys:
+                    self._in_flight.pop(key, None)
+            self._slots.release()
+            raise
+        future.add_done_callback(partial(self._finish, [job.pk for job in jobs], keys, executor, threading.get_ident()))
+        return jobs
+
+    def submit(self, image_bytes, id_number_only=False):
+        """Queue `image_bytes` for recognition. Raises QueueFull when busy."""
+        purge_expired_jobs()
+        options = preprocess_options(id_number_only)
+        key = content_key(image_bytes, options)
+        job = self._known_job(key)
+        if job is not None:
+            return job
+        return self._run([key], ocr.recognize_many, [image_bytes], **options)[0]
+
+    def submit_batch(self, images):
+        """
+        Queue several images as one batched inference pass, taking a single
+        queue slot; returns their jobs in order. Raises QueueFull when busy.
+        """
+        purge_expired_jobs()
+        options = preprocess_options()
+        jobs = [None] * len(images)
+        todo = {}
+        for i, image_bytes in enumerate(images):
+            key = content_key(image_bytes, options)
+            jobs[i] = self._known_job(key)
+            if jobs[i] is None:
+                # Duplicates within the batch share one job.
+                todo.setdefault(key, (image_bytes, []))[1].append(i)
+        if todo:
+            keys = list(todo)
+            started = self._run(
+                keys, ocr.recognize_many, [todo[key][0] for key in keys],
+                batch_size=settings.OCR_BATCH_SIZE, **options,
+            )
+            for key, job in zip(keys, started):
+                for i in todo[key][1]:
+                    jobs[i] = job
+        return jobs
+
+    def _finish(self, job_ids, keys, executor, submitted_from, future):
+        try:
+            try:
+                texts = future.result()
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); every job in the pool fails.
+                self._discard_executor(executor)
+                OCRJob.objects.filter(pk__in=job_ids).update(
+                    status="failed", error="OCR worker stopped unexpectedly", finished_at=timezone.now()
+                )
+            except Exception as e:
+                OCRJob.objects.filter(pk__in=job_ids).update(
+                    status="failed", error=str(e)[:255], finished_at=timezone.now()
+                )
+            else:
+                for job_id, key, text in zip(job_ids, keys, texts):
+                    if text is None:
+                        OCRJob.objects.filter(pk=job_id).update(
+                            status="failed", error="cannot identify image file", finished_at=timezone.now()
+                        )
+                    else:
+                        OCRJob.objects.filter(pk=job_id).update(status="done", text=text, finished_at=timezone.now())
+                        remember_text(key, text)
+        finally:
+            with self._lock:
+                for key in keys:
+                    self._in_flight.pop(key, None)
+            self._slots.release()
+            if executor is not None and threading.get_ident() != submitted_from:
+                # The executor's callback thread is not a request thread, so
+                # nothing else closes its connection.
+                connections.close_all()
+
+
+queue = OCRQueue()
+
+
+def preprocess_options(id_number_only=False):
+    """ocr.preprocess() arguments from the OCR_* settings."""
+    return {
+        "max_side": settings.OCR_MAX_SIDE,
+        "grayscale": settings.OCR_GRAYSCALE,
+        "threshold": settings.OCR_THRESHOLD,
+        "region": settings.OCR_ID_NUMBER_REGION if id_number_only else None,
+    }
+
+
+def purge_expired_jobs():
+    """OCR results hold ID numbers; only keep them for OCR_JOB_RETENTION."""
+    OCRJob.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=settings.OCR_JOB_RETENTION)).delete()
+
+
+def job_status(job):
+    """Pending jobs past OCR_JOB_TIMEOUT are reported as failed (e.g. the worker died)."""
+    if job.status == "pending" and timezone.now() - job.created_at > timedelta(seconds=settings.OCR_JOB_TIMEOUT):
+        return "failed"
+    return job.status
+
+
+def content_key(image_bytes, options):
+    """OCRResult key: SHA-256 of the image bytes and the preprocess() options."""
+    digest = hashlib.sha256(image_bytes)
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def cached_text(key):
+    """Cached text for `key`, or None. A hit counts as a use for eviction."""
+    text = OCRResult.objects.filter(pk=key).values_list("text", flat=True).first()
+    if text is not None:
+        OCRResult.objects.filter(pk=key).update(last_used_at=timezone.now())
+    return text
+
+
+def remember_text(key, text):
+    """Cache `text`, then evict the least recently used beyond OCR_CACHE_MAX_ENTRIES."""
+    OCRResult.objects.update_or_create(key=key, defaults={"text": text, "last_used_at": timezone.now()})
+    stale = list(
+        OCRResult.objects.order_by("-last_used_at", "key").values_list("key", flat=True)[settings.OCR_CACHE_MAX_ENTRIES:]
+    )
+    if stale:
+        OCRResult.objects.filter(pk__in=stale).delete()
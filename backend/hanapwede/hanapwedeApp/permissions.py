@@ -4,4 +4,10 @@ from rest_framework.permissions import BasePermission
 class IsEmployer(BasePermission):
    
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.user_type == 'Employer'
\ No newline at end of file
+        return request.user.is_authenticated and request.user.user_type == 'Employer'
+
+
+class IsAdmin(BasePermission):
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (request.user.user_type == 'Admin' or request.user.is_staff)
@@ -0,0 +1,658 @@
+import copy
+import logging
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from operator import itemgetter
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+from django.conf import settings
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+from .catalog import catalog_version, fetch_jobs
+from .models import EmployeeProfile, JobPost, User
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: writers are only serialized within a process
+    fcntl = None
+
+
+# Bump whenever the on-disk layout changes; older files are rebuilt from the DB.
+INDEX_FORMAT = 4
+
+_ANALYZERS = {}
+
+
+def _label_names(names):
+    return [name.lower() for name in names]
+
+
+def get_analyzer(kind):
+    """Same tokenizers the views used to get from a freshly fitted TfidfVectorizer."""
+    if kind not in _ANALYZERS:
+        if kind == "text":
+            _ANALYZERS[kind] = CountVectorizer(stop_words="english").build_analyzer()
+        elif kind == "skills":
+            _ANALYZERS[kind] = CountVectorizer().build_analyzer()
+        elif kind == "labels":
+            _ANALYZERS[kind] = _label_names
+        else:
+            raise ValueError(f"Unknown analyzer: {kind}")
+    return _ANALYZERS[kind]
+
+
+class TermIndex:
+    """
+    Raw term counts for a growing set of rows plus their document frequencies.
+
+    Keeping counts instead of fitted TF-IDF weights means rows can be added or
+    removed one job at a time and the IDF is recomputed from `df`, giving the
+    same weights TfidfVectorizer(smooth_idf=True, norm="l2") would produce if it
+    were refitted on the whole catalog.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.terms = []
+        self.vocabulary = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = sp.csr_matrix((0, 0), dtype=np.float64)
+        self._tfidf = None
+
+    def __len__(self):
+        return self.counts.shape[0]
+
+    def _count(self, docs, grow):
+        analyze = get_analyzer(self.analyzer)
+        indptr, indices, data = [0], [], []
+        for doc in docs:
+            row = {}
+            for term in analyze(doc):
+                col = self.vocabulary.get(term)
+                if col is None:
+                    if not grow:
+                        continue
+                    col = len(self.terms)
+                    self.vocabulary[term] = col
+                    self.terms.append(term)
+                row[col] = row.get(col, 0) + 1
+            indices.extend(row.keys())
+            data.extend(row.values())
+            indptr.append(len(indices))
+        return sp.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int32)),
+            shape=(len(docs), len(self.terms)),
+        )
+
+    def add(self, keys, docs):
+        rows = self._count(docs, grow=True)
+        n_terms = len(self.terms)
+        self.df = np.concatenate([self.df, np.zeros(n_terms - len(self.df), dtype=np.int64)])
+        self.df += np.bincount(rows.indices, minlength=n_terms)
+        counts = self.counts.copy()
+        counts.resize((counts.shape[0], n_terms))
+        self.counts = sp.vstack([counts, rows], format="csr")
+        self.keys = np.concatenate([self.keys, np.asarray(keys, dtype=np.int64)])
+        self._tfidf = None
+
+    def copy(self):
+        """
+        A copy that can be changed without affecting this index. `counts` and
+        `keys` are only ever replaced, never modified, so they are shared.
+        """
+        index = copy.copy(self)
+        index.terms = list(self.terms)
+        index.vocabulary = dict(self.vocabulary)
+        index.df = self.df.copy()
+        return index
+
+    def remove(self, keys):
+        drop = np.isin(self.keys, np.asarray(list(keys), dtype=np.int64))
+        if not drop.any():
+            return
+        dropped = self.counts[drop]
+        self.df -= np.bincount(dropped.indices, minlength=len(self.terms))
+        self.counts = self.counts[~drop]
+        self.keys = self.keys[~drop]
+        self._tfidf = None
+
+    def idf(self):
+        n_docs = len(self)
+        idf = np.log((1 + n_docs) / (1 + self.df)) + 1
+        # Terms whose documents were all removed are unknown to a fresh fit.
+        idf[self.df == 0] = 0
+        return idf
+
+    def _weigh(self, counts):
+        if not counts.nnz:
+            return sp.csr_matrix(counts.shape, dtype=np.float64)
+        return normalize(counts.multiply(self.idf()).tocsr())
+
+    def tfidf(self):
+        if self._tfidf is None:
+            self._tfidf = self._weigh(self.counts)
+        return self._tfidf
+
+    def transform(self, docs):
+        return self._weigh(self._count(docs, grow=False))
+
+    def project(self, other):
+        """
+        Rows of another TermIndex weighed with this index's vocabulary and IDF,
+        i.e. transform() of the documents `other` was built from, without
+        re-tokenizing them.
+        """
+        columns = np.array([self.vocabulary.get(term, -1) for term in other.terms], dtype=np.int64)
+        known = np.flatnonzero(columns >= 0)
+        mapping = sp.csr_matrix(
+            (np.ones(len(known)), (known, columns[known])),
+            shape=(len(other.terms), len(self.terms)),
+        )
+        return self._weigh((other.counts @ mapping).tocsr())
+
+    def state(self, prefix):
+        return {
+            f"{prefix}_analyzer": np.array(self.analyzer),
+            f"{prefix}_terms": np.array(self.terms, dtype=np.str_),
+            f"{prefix}_df": self.df,
+            f"{prefix}_keys": self.keys,
+            f"{prefix}_data": self.counts.data,
+            f"{prefix}_indices": self.counts.indices,
+            f"{prefix}_indptr": self.counts.indptr,
+            f"{prefix}_shape": np.array(self.counts.shape),
+        }
+
+    @classmethod
+    def from_state(cls, state, prefix):
+        index = cls(str(state[f"{prefix}_analyzer"]))
+        index.terms = state[f"{prefix}_terms"].tolist()
+        index.vocabulary = {term: col for col, term in enumerate(index.terms)}
+        index.df = state[f"{prefix}_df"]
+        index.keys = state[f"{prefix}_keys"]
+        index.counts = sp.csr_matrix(
+            (state[f"{prefix}_data"], state[f"{prefix}_indices"], state[f"{prefix}_indptr"]),
+            shape=tuple(state[f"{prefix}_shape"]),
+        )
+        return index
+
+
+def job_document(job):
+    """Text a job is indexed under; mirrors the old combined_text column."""
+    return (
+        f"{job['job_description']} {job['skills_required']} {', '.join(job['tags'])} "
+        f"{job['category'] or ''}, {', '.join(job['disabilitytag'])}"
+    )
+
+
+def skill_phrases(skills):
+    """Comma separated skills as lowercase phrases, e.g. "Data entry, Excel"."""
+    phrases = (s.strip().lower() for s in (skills or "").split(","))
+    return [phrase for phrase in phrases if phrase]
+
+
+def user_document(preferred_tag_names, user_disability, user_skills):
+    return (
+        " ".join(preferred_tag_names) + " " +
+        " ".join(preferred_tag_names) + ", " +
+        (user_disability or "") + " " +
+        ((user_skills or "") + " ") * 2
+    )
+
+
+def label_matches(labels, user_terms):
+    """Labels that contain, or are contained in, any of the user's terms."""
+    return np.array([any(u in label or label in u for u in user_terms) for label in labels], dtype=bool)
+
+
+def bucket_jobs(disability_match, skill_match, pref_match):
+    """Which jobs are recommended, and their Green/Yellow/Red colour."""
+    included = disability_match & (skill_match | pref_match)
+    color = np.select(
+        [skill_match & pref_match, skill_match, pref_match],
+        ["Green", "Yellow", "Red"],
+        "Uncategorized",
+    )
+    return included, color
+
+
+def top_rows(scores, included, keys, k=None):
+    """
+    Rows of the `k` best included jobs, best first, with ties broken by key.
+    With `k` set only the top of the score array is selected (argpartition)
+    and sorted, instead of sorting every included job.
+    """
+    candidates = np.flatnonzero(included)
+    if k is not None and k < len(candidates):
+        if k <= 0:
+            return candidates[:0]
+        negated = -scores[candidates]
+        kth = negated[np.argpartition(negated, k - 1)[k - 1]]
+        better = candidates[negated < kth]
+        tied = candidates[negated == kth]
+        # Of the rows tied with the k-th score, the ones with the lowest keys make the cut.
+        needed = k - len(better)
+        if needed < len(tied):
+            tied = tied[np.argpartition(keys[tied], needed - 1)[:needed]]
+        candidates = np.concatenate([better, tied])
+    return candidates[np.lexsort((keys[candidates], -scores[candidates]))]
+
+
+class IndexFile:
+    """
+    Saving and loading of the TermIndexes named in `term_indexes`, plus
+    `checked_version`: the version its rows were last checked against (see
+    IndexStore.get_current).
+    """
+
+    term_indexes = ()
+    checked_version = None
+
+    @property
+    def keys(self):
+        """Key of each row, in row order."""
+        return getattr(self, self.term_indexes[0]).keys
+
+    def copy(self):
+        index = type(self)()
+        for name in self.term_indexes:
+            setattr(index, name, getattr(self, name).copy())
+        index.checked_version = self.checked_version
+        return index
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        state = {}
+        for name in self.term_indexes:
+            state.update(getattr(self, name).state(name))
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                format=np.array(INDEX_FORMAT),
+                checked_version=np.array(-1 if self.checked_version is None else self.checked_version),
+                **state,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            if int(state["format"]) != INDEX_FORMAT:
+                raise ValueError(f"Outdated {cls.__name__} format")
+            index = cls()
+            for name in cls.term_indexes:
+                setattr(index, name, TermIndex.from_state(state, name))
+            checked_version = int(state["checked_version"])
+            index.checked_version = None if checked_version == -1 else checked_version
+        return index
+
+
+class JobIndex(IndexFile):
+    """
+    TF-IDF vectors for every JobPost, updated incrementally as jobs change.
+
+    `tags` and `disabilities` hold one incidence row per job, in the same row
+    order as `text`, so the recommendation filters are sparse products too.
+    `skills` holds one row per required-skill phrase, keyed by its job, over a
+    vocabulary shared by the whole catalog.
+    """
+
+    term_indexes = ("text", "tags", "disabilities", "skills")
+
+    def __init__(self):
+        self.text = TermIndex("text")
+        self.tags = TermIndex("labels")
+        self.disabilities = TermIndex("labels")
+        self.skills = TermIndex("skills")
+        self._order = None
+        self._skill_rows = None
+
+    @property
+    def post_ids(self):
+        return self.text.keys
+
+    def __len__(self):
+        return len(self.text)
+
+    def upsert(self, jobs):
+        jobs = list(jobs)
+        self.remove(job["post_id"] for job in jobs)
+        post_ids = [job["post_id"] for job in jobs]
+        self.text.add(post_ids, [job_document(job) for job in jobs])
+        self.tags.add(post_ids, [job["tags"] for job in jobs])
+        self.disabilities.add(post_ids, [job["disabilitytag"] for job in jobs])
+        skills = [(job["post_id"], phrase) for job in jobs for phrase in skill_phrases(job["skills_required"])]
+        self.skills.add([post_id for post_id, _ in skills], [phrase for _, phrase in skills])
+        self._order = self._skill_rows = None
+
+    def remove(self, post_ids):
+        post_ids = list(post_ids)
+        if post_ids:
+            self.text.remove(post_ids)
+            self.tags.remove(post_ids)
+            self.disabilities.remove(post_ids)
+            self.skills.remove(post_ids)
+            self._order = self._skill_rows = None
+
+    def score(self, user_profile):
+        """Cosine similarity of the user profile against every indexed job."""
+        user_vector = self.text.transform([user_profile])
+        return (self.text.tfidf() @ user_vector.T).toarray().ravel()
+
+    @staticmethod
+    def _has_label(labels, user_terms):
+        matches = label_matches(labels.terms, user_terms).astype(np.float64)
+        return (labels.counts @ matches) > 0
+
+    @staticmethod
+    def _unlabelled(labels):
+        return np.diff(labels.counts.indptr) == 0
+
+    def disability_match(self, user_disability):
+        # Jobs without disability tags are open to everyone.
+        user_disability = (user_disability or "").lower()
+        return self._has_label(self.disabilities, [user_disability]) | self._unlabelled(self.disabilities)
+
+    def preference_match(self, preferred_tag_names):
+        # Untagged jobs match any user who picked at least one preference.
+        preferred = [name.lower() for name in preferred_tag_names]
+        return self._has_label(self.tags, preferred) | (self._unlabelled(self.tags) & bool(preferred))
+
+    def _best_skill_per_job(self, similarity):
+        """Highest similarity of each job's skills, from a (skill rows x phrases) product."""
+        job_best = np.zeros(len(self))
+        if similarity.shape[0] and similarity.shape[1]:
+            if self._skill_rows is None:
+                self._skill_rows = self.positions(self.skills.keys)
+            np.maximum.at(job_best, self._skill_rows, similarity.max(axis=1).toarray().ravel())
+        return job_best
+
+    def skill_match(self, user_skills, threshold=0.5):
+        """
+        Jobs with at least one required skill whose cosine similarity to one of
+        the user's skills is above `threshold`, computed for the whole catalog
+        in a single product against the skill index.
+        """
+        user_vectors = self.skills.transform(skill_phrases(user_skills))
+        return self._best_skill_per_job(self.skills.tfidf() @ user_vectors.T) > threshold
+
+    def match(self, preferred_tag_names, user_disability, user_skills):
+        """
+        Similarity score, included mask, colour and disability match for every
+        indexed job, in index row order.
+        """
+        return self.match_many([(preferred_tag_names, user_disability, user_skills)])[0]
+
+    def match_many(self, profiles, threshold=0.5):
+        """
+        match() for a batch of (preferred_tag_names, user_disability, user_skills)
+        profiles. Text and skill similarities for the whole batch come from one
+        sparse product each.
+        """
+        documents = [user_document(*profile) for profile in profiles]
+        scores = (self.text.tfidf() @ self.text.transform(documents).T).toarray()
+
+        phrases = [skill_phrases(user_skills) for _, _, user_skills in profiles]
+        bounds = np.cumsum([0] + [len(user_phrases) for user_phrases in phrases])
+        skill_vectors = self.skills.transform([phrase for user_phrases in phrases for phrase in user_phrases])
+        skill_similarity = (self.skills.tfidf() @ skill_vectors.T).tocsc()
+
+        matches = []
+        for i, (preferred_tag_names, user_disability, _) in enumerate(profiles):
+            disability_match = self.disability_match(user_disability)
+            pref_match = self.preference_match(preferred_tag_names)
+            skill_match = self._best_skill_per_job(skill_similarity[:, bounds[i]:bounds[i + 1]]) > threshold
+            included, colors = bucket_jobs(disability_match, skill_match, pref_match)
+            matches.append((scores[:, i], included, colors, disability_match))
+        return matches
+
+    def positions(self, post_ids):
+        """Row of each post id in this index, or -1 when it is not indexed."""
+        post_ids = np.asarray(post_ids, dtype=np.int64)
+        if not len(self):
+            return np.full(len(post_ids), -1)
+        if self._order is None:
+            self._order = np.argsort(self.post_ids)
+        found = np.searchsorted(self.post_ids, post_ids, sorter=self._order).clip(max=len(self) - 1)
+        rows = self._order[found]
+        return np.where(self.post_ids[rows] == post_ids, rows, -1)
+
+
+def load_job_documents(post_ids=None):
+    """Fields of each JobPost that feed its index vectors."""
+    job_posts = JobPost.objects.all()
+    if post_ids is not None:
+        job_posts = job_posts.filter(post_id__in=post_ids)
+    return fetch_jobs(job_posts)
+
+
+def file_stamp(path):
+    """
+    Changes whenever the file is replaced: save() writes a new file, so the
+    inode changes even where mtimes are too coarse to tell two writes apart.
+    """
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_ino
+
+
+class IndexStore:
+    """
+    Process-wide copy of an index persisted under RECOMMENDER_INDEX_DIR. It is
+    loaded from disk (or built once from the DB when no usable file exists)
+    and reloaded when another process rewrites the file. Writers hold an
+    exclusive flock on a sidecar <filename>.lock, so workers refreshing at the
+    same time apply their changes one after the other instead of each saving
+    over the other's.
+
+    Indexes handed out by get() are never modified: writers change a copy,
+    save it and then swap it in, so requests still using the old one see
+    consistent rows.
+
+    `load_rows(keys=None)` reads the rows the index is built from, and
+    `key(row)` gives the key a row is indexed under. Optionally `load_keys()`
+    reads the keys of every row that belongs in the index, and `version()` is
+    a counter bumped whenever rows are added or removed; see get_current().
+    """
+
+    def __init__(self, index_class, filename, load_rows, key, load_keys=None, version=None):
+        self.index_class = index_class
+        self.filename = filename
+        self.load_rows = load_rows
+        self.key = key
+        self.load_keys = load_keys
+        self.version = version
+        self._lock = threading.RLock()
+        self._file_lock = None
+        self._index = None
+        self._path = None
+        self._stamp = None
+
+    def path(self):
+        return Path(settings.RECOMMENDER_INDEX_DIR) / self.filename
+
+    @contextmanager
+    def _writing(self):
+        """Held around every read-modify-write of the index file."""
+        with self._lock:
+            if self._file_lock is not None or fcntl is None:
+                # Already held by this thread (e.g. refresh() -> get() -> rebuild()).
+                yield
+                return
+            path = self.path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path.with_name(f"{path.name}.lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._file_lock = lock_file
+                try:
+                    yield
+                finally:
+                    # Closing the file releases the flock.
+                    self._file_lock = None
+
+    def _save(self, index, path):
+        index.save(path)
+        self._index, self._path, self._stamp = index, path, file_stamp(path)
+
+    def get(self):
+        with self._lock:
+            path = self.path()
+            try:
+                stamp = file_stamp(path)
+            except FileNotFoundError:
+                stamp = None
+
+            if self._index is not None and self._path == path and stamp in (None, self._stamp):
+                return self._index
+
+            if stamp is not None:
+                try:
+                    self._index, self._path, self._stamp = self.index_class.load(path), path, stamp
+                    return self._index
+                except (OSError, ValueError, KeyError):
+                    pass
+
+            return self.rebuild()
+
+    def get_current(self):
+        """
+        get(), after re-indexing any row whose refresh was lost (e.g. a worker
+        that died before its on-commit refresh ran): rows missing from the
+        index and rows it still holds after they were removed. The keys are
+        only compared when version() has moved since the last check, so a
+        request normally costs a cached counter read.
+        """
+        index = self.get()
+        if self.version is None:
+            return index
+        version = self.version()
+        if index.checked_version == version:
+            return index
+        with self._writing():
+            index = self.get()
+            if index.checked_version == version:
+                return index
+            # version was read first, so a change made after this read bumps it again.
+            stale = set(self.load_keys()).symmetric_difference(index.keys.tolist())
+            index = index.copy()
+            if stale:
+                logger.warning(
+                    "%s was out of date for %d row(s) %s; refreshing them",
+                    self.filename, len(stale), sorted(stale)[:20],
+                )
+                self._apply(index, stale)
+            index.checked_version = version
+            self._save(index, self.path())
+            return index
+
+    def rebuild(self):
+        with self._writing():
+            index = self.index_class()
+            index.checked_version = self.version and self.version()
+            index.upsert(self.load_rows())
+            self._save(index, self.path())
+            return index
+
+    def _apply(self, index, keys):
+        rows = self.load_rows(keys)
+        index.remove(keys - {self.key(row) for row in rows})
+        index.upsert(rows)
+
+    def refresh(self, keys):
+        """Re-index the given rows, dropping the ones that no longer exist."""
+        keys = set(keys)
+        if not keys:
+            return
+        with self._writing():
+            # Under the file lock, so this reloads any write that just finished.
+            index = self.get().copy()
+            self._apply(index, keys)
+            self._save(index, self.path())
+
+    def remove(self, keys):
+        with self._writing():
+            index = self.get().copy()
+            index.remove(keys)
+            self._save(index, self.path())
+
+
+def load_job_keys():
+    return JobPost.objects.values_list("post_id", flat=True)
+
+
+job_store = IndexStore(
+    JobIndex, "job_index.npz", load_job_documents, itemgetter("post_id"), load_job_keys, catalog_version
+)
+
+
+def index_path():
+    return job_store.path()
+
+
+def get_job_index():
+    return job_store.get()
+
+
+def get_current_job_index():
+    """get_job_index(), checked against the catalog once per catalog version."""
+    return job_store.get_current()
+
+
+def rebuild_job_index():
+    return job_store.rebuild()
+
+
+def refresh_jobs(post_ids):
+    job_store.refresh(post_ids)
+
+
+def remove_jobs(post_ids):
+    job_store.remove(post_ids)
+
+
+def load_profiles(profiles):
+    """
+    (user_id, (preferred_tag_names, user_disability, user_skills)) for each
+    EmployeeProfile in the `profiles` queryset, read in two queries.
+    """
+    profiles = profiles.order_by("user_id")
+    preferences = defaultdict(list)
+    for user_id, name in User.preferences.through.objects.filter(
+        user_id__in=profiles.values("user_id")
+    ).order_by("id").values_list("user_id", "tag__name"):
+        preferences[user_id].append(name)
+    return [
+        (user_id, (preferences[user_id], user_disability, skills))
+        for user_id, user_disability, skills in profiles.values_list("user_id", "user_disability", "skills")
+    ]
+
+
+def load_activated_profiles(user_ids=None):
+    """load_profiles() of every activated EmployeeProfile, or those among `user_ids`."""
+    profiles = EmployeeProfile.objects.filter(activated=True)
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    return load_profiles(profiles)
+
+
+def rank_profiles(index, profiles, top_k):
+    """
+    Best `top_k` included jobs for each profile as (post_id, score, colour)
+    lists, scored in one batch with JobIndex.match_many().
+    """
+    rankings = []
+    for scores, included, colors, _ in index.match_many(profiles):
+        top = top_rows(scores, included, index.post_ids, top_k)
+        rankings.append([
+            (int(index.post_ids[row]), float(scores[row]), str(colors[row]))
+            for row in top.tolist()
+        ])
+    return rankings
@@ -0,0 +1,74 @@
+"""
+Cached recommend_jobs responses and their invalidation.
+
+Kept apart from recommender.py so that the views and signals can use it
+without importing numpy, scipy and scikit-learn.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .catalog import bump_cache_version, cache_version, catalog_version
+from .models import JobRecommendation
+
+
+PROFILE_VERSION_KEY = "recommendations:profile:{}"
+
+
+class ResultCache:
+    """Least recently used recommend_jobs responses, keyed by result_key()."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+results = ResultCache(settings.RECOMMENDATION_CACHE_SIZE)
+
+
+def result_key(user_id, *params):
+    """
+    Cache key for one user's ranking. It embeds the user's profile version and
+    the catalog version, so a change to either makes old entries unreachable.
+    The process that made the change stops using them at once; the counters
+    are shared (see catalog.cache_version), so other processes follow within
+    CACHE_VERSION_TTL seconds, or at once when CACHE_REDIS_URL is set.
+    """
+    return (
+        user_id,
+        cache_version(PROFILE_VERSION_KEY.format(user_id)),
+        catalog_version(),
+        *params,
+    )
+
+
+def invalidate_profile(user_id):
+    bump_cache_version(PROFILE_VERSION_KEY.format(user_id))
+    results.discard_user(user_id)
+    # A precomputed ranking no longer matches the profile; fall back to live.
+    JobRecommendation.objects.filter(user_id=user_id).delete()
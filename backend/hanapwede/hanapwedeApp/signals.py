@@ -0,0 +1,153 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import catalog, result_cache
+from .models import DisabilityTag, EmployeeProfile, EmployerProfile, JobPost, Tag, User
+
+logger = logging.getLogger(__name__)
+
+
+# The index modules pull in numpy, scipy and scikit-learn, so they are only
+# imported once an index actually has to change, not when the app loads.
+#
+# These run on commit, after the request's own write has succeeded, so an
+# index error is logged rather than turned into a 500. The jobs it left out
+# are re-indexed by the next get_current_job_index() (recommend_jobs), or by
+# rebuild_job_index.
+
+def _refresh_jobs(post_ids):
+    try:
+        from . import recommender
+        recommender.refresh_jobs(post_ids)
+    except Exception:
+        logger.exception("Refreshing jobs %s in the job index failed", sorted(post_ids))
+
+
+def _remove_jobs(post_ids):
+    try:
+        from . import recommender
+        recommender.remove_jobs(post_ids)
+    except Exception:
+        logger.exception("Removing jobs %s from the job index failed", sorted(post_ids))
+
+
+def _refresh_profiles(user_ids):
+    try:
+        from . import candidates
+        candidates.refresh_profiles(user_ids)
+    except Exception:
+        logger.exception("Refreshing profiles %s in the candidate index failed", sorted(user_ids))
+
+
+def _refresh_on_commit(post_ids):
+    post_ids = set(post_ids)
+    if post_ids:
+        transaction.on_commit(lambda: _refresh_jobs(post_ids))
+
+
+@receiver(post_save, sender=JobPost)
+def index_saved_job(sender, instance, **kwargs):
+    _refresh_on_commit([instance.post_id])
+
+
+@receiver(post_delete, sender=JobPost)
+def unindex_deleted_job(sender, instance, **kwargs):
+    post_id = instance.post_id
+    transaction.on_commit(lambda: _remove_jobs([post_id]))
+
+
+@receiver(m2m_changed, sender=JobPost.tags.through)
+@receiver(m2m_changed, sender=JobPost.disabilitytag.through)
+def index_job_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        _refresh_on_commit([instance.post_id])
+    elif pk_set:
+        _refresh_on_commit(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=DisabilityTag)
+def index_renamed_tag(sender, instance, created, **kwargs):
+    if not created:
+        _refresh_on_commit(instance.jobpost_set.values_list("post_id", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=DisabilityTag)
+def index_deleted_tag(sender, instance, **kwargs):
+    # The through rows vanish with the tag, so collect the affected jobs first.
+    _refresh_on_commit(list(instance.jobpost_set.values_list("post_id", flat=True)))
+
+
+def _refresh_profiles_on_commit(user_ids):
+    user_ids = set(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: _refresh_profiles(user_ids))
+
+
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_delete, sender=EmployeeProfile)
+def index_profile(sender, instance, **kwargs):
+    # refresh_profiles() also drops profiles that were deleted or deactivated.
+    _refresh_profiles_on_commit([instance.user_id])
+
+
+@receiver(m2m_changed, sender=User.preferences.through)
+def index_profile_preferences(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        _refresh_profiles_on_commit([instance.id])
+    elif pk_set:
+        _refresh_profiles_on_commit(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+def index_renamed_preference(sender, instance, created, **kwargs):
+    if not created:
+        _refresh_profiles_on_commit(instance.user_set.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def index_deleted_preference(sender, instance, **kwargs):
+    _refresh_profiles_on_commit(list(instance.user_set.values_list("id", flat=True)))
+
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=DisabilityTag)
+@receiver(post_delete, sender=DisabilityTag)
+@receiver(post_save, sender=EmployerProfile)
+@receiver(post_delete, sender=EmployerProfile)
+@receiver(m2m_changed, sender=JobPost.tags.through)
+@receiver(m2m_changed, sender=JobPost.disabilitytag.through)
+def invalidate_job_catalog(sender, action="post_save", **kwargs):
+    # m2m_changed also fires pre_add/pre_remove/pre_clear; only react once.
+    if action.startswith("post_"):
+        transaction.on_commit(catalog.invalidate_catalog)
+        # Stale rankings are unreachable once the version moves; free them too.
+        transaction.on_commit(result_cache.results.clear)
+
+
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_delete, sender=EmployeeProfile)
+def invalidate_profile_recommendations(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: result_cache.invalidate_profile(user_id))
+    transaction.on_commit(catalog.invalidate_profiles)
+
+
+@receiver(m2m_changed, sender=User.preferences.through)
+def invalidate_preference_recommendations(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    user_ids = (pk_set or set()) if reverse else {instance.id}
+    for user_id in user_ids:
+        transaction.on_commit(lambda user_id=user_id: result_cache.invalidate_profile(user_id))
@@ -1,3 +1,1060 @@
-from django.test import TestCase
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+try:
+    from fakeredis import TcpFakeServer
+except ImportError:  # only needed by ChatChannelLayerTests (requirements-dev.txt)
+    TcpFakeServer = None
+
+from .catalog import load_job_catalog
+from .ChatConsumer import ChatConsumer, message_writer, save_messages
+from .models import (
+    ChatRooms, DisabilityTag, EmployeeProfile, EmployerProfile, JobPost, JobRecommendation, Messages, OCRJob,
+    OCRResult, PWDCard, Tag, User,
+)
+from .routing import websocket_urlpatterns
+from .unread import mark_read
+from .ws_auth import TokenAuthMiddleware
+from . import candidates, catalog, instrumentation, ocr, ocr_jobs, recommender, result_cache
+
+
+class JobCatalogFixture:
+    """Employers, tags and JOB_COUNT jobs, plus one activated job seeker."""
+
+    JOB_COUNT = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        tags = [Tag.objects.create(name=name) for name in ("IT", "Health", "Education")]
+        disability_tags = [DisabilityTag.objects.create(name=name) for name in ("Visual", "Hearing")]
+
+        employers = []
+        for i in range(10):
+            employer = User.objects.create(username=f"employer{i}", user_type="Employer")
+            EmployerProfile.objects.create(user=employer, comp_name=f"Company {i}")
+            employers.append(employer)
+
+        jobs = JobPost.objects.bulk_create(
+            JobPost(
+                posted_by=employers[i % len(employers)],
+                job_title=f"Job {i}",
+                job_desc="python support remote",
+                skills_req="python, customer support",
+                category="IT",
+                location="Manila",
+            )
+            for i in range(cls.JOB_COUNT)
+        )
+        JobPost.tags.through.objects.bulk_create(
+            JobPost.tags.through(jobpost_id=job.post_id, tag_id=tags[i % len(tags)].id)
+            for i, job in enumerate(jobs)
+        )
+        JobPost.disabilitytag.through.objects.bulk_create(
+            JobPost.disabilitytag.through(jobpost_id=job.post_id, disabilitytag_id=disability_tags[i % 2].id)
+            for i, job in enumerate(jobs)
+        )
+
+        cls.employee = User.objects.create(username="seeker", user_type="Employee")
+        EmployeeProfile.objects.create(user=cls.employee, user_disability="Visual", skills="python", activated=True)
+        cls.employee.preferences.set(tags[:1])
+
+    def setUp(self):
+        cache.clear()
+        result_cache.results.clear()
+
+
+class JobCatalogQueryCountTests(JobCatalogFixture, TestCase):
+    def test_catalog_loader(self):
+        with self.assertNumQueries(3):
+            jobs = load_job_catalog()
+        self.assertEqual(len(jobs), self.JOB_COUNT)
+        self.assertEqual(jobs[0]["comp_name"], "Company 0")
+        self.assertEqual(jobs[0]["tags"], "IT")
+        self.assertEqual(jobs[0]["disabilitytag"], "Visual")
+
+    def test_all_jobs_views(self):
+        client = APIClient()
+        # The three catalog queries, plus reading and seeding the catalog
+        # version in CacheVersion (settings use the per-process LocMemCache).
+        with self.assertNumQueries(6):
+            response = client.get("/api/all-jobs-public/")
+        self.assertEqual(len(response.json()), self.JOB_COUNT)
+
+        client.force_authenticate(self.employee)
+        with self.assertNumQueries(0):
+            response = client.get("/api/all-jobs/")
+        self.assertEqual(len(response.json()), self.JOB_COUNT)
+
+    def test_catalog_snapshot(self):
+        client = APIClient()
+        etag = client.get("/api/all-jobs-public/")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = client.get("/api/all-jobs-public/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = EmployerProfile.objects.get(user__username="employer0")
+            profile.comp_name = "Renamed"
+            profile.save()
+        response = client.get("/api/all-jobs-public/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()[0]["comp_name"], "Renamed")
+
+    def test_cursor_pagination(self):
+        client = APIClient()
+        seen = []
+        params = {"limit": 300, "fields": "post_id,job_title"}
+        while True:
+            with self.assertNumQueries(2):
+                page = client.get("/api/all-jobs-public/", params).json()
+            seen.extend(page["results"])
+            if not page["next_cursor"]:
+                break
+            params["cursor"] = page["next_cursor"]
+
+        self.assertEqual(len(seen), self.JOB_COUNT)
+        self.assertEqual(set(seen[0]), {"post_id", "job_title"})
+        self.assertEqual([job["post_id"] for job in seen], sorted((job["post_id"] for job in seen), reverse=True))
+
+        tag = Tag.objects.get(name="Health")
+        page = client.get("/api/all-jobs-public/", {"tag": tag.id, "limit": 5, "fields": "tags"}).json()
+        self.assertEqual([job["tags"] for job in page["results"]], ["Health"] * 5)
+
+        response = client.get("/api/all-jobs-public/", {"fields": "password"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CatalogVersionTests(TestCase):
+    """Version counters and the catalog snapshot seen from two worker processes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create(username="employer", user_type="Employer")
+        EmployerProfile.objects.create(user=employer, comp_name="Company")
+        cls.job = JobPost.objects.create(posted_by=employer, job_title="Clerk", job_desc="filing")
+
+    def setUp(self):
+        # Each worker has its own LocMemCache and its own snapshot global.
+        self.workers = [{"cache": LocMemCache(f"worker-{i}", {}), "snapshot": None} for i in range(2)]
+
+    def in_worker(self, worker, fn, *args):
+        with mock.patch.object(catalog, "cache", worker["cache"]), \
+                mock.patch.object(catalog, "_snapshot", worker["snapshot"]):
+            result = fn(*args)
+            worker["snapshot"] = catalog._snapshot
+        return result
+
+    def test_invalidation_reaches_other_workers(self):
+        first, second = self.workers
+        before = [self.in_worker(worker, catalog.get_catalog_snapshot) for worker in self.workers]
+        self.assertEqual(before[0].etag, before[1].etag)
+
+        # The first worker handles a job edit.
+        JobPost.objects.filter(pk=self.job.pk).update(job_title="Senior clerk")
+        self.in_worker(first, catalog.invalidate_catalog)
+        self.assertIn(b"Senior clerk", self.in_worker(first, catalog.get_catalog_snapshot).body)
+
+        # The second still has the old version memoized, for at most CACHE_VERSION_TTL...
+        self.assertEqual(self.in_worker(second, catalog.get_catalog_snapshot).etag, before[1].etag)
+        # ...after which it rereads the counter and rebuilds.
+        second["cache"].clear()
+        after = self.in_worker(second, catalog.get_catalog_snapshot)
+        self.assertNotEqual(after.etag, before[1].etag)
+        self.assertIn(b"Senior clerk", after.body)
+
+    @override_settings(CACHE_VERSION_TTL=0)
+    def test_counter_lives_in_the_database(self):
+        versions = [self.in_worker(worker, catalog.catalog_version) for worker in self.workers]
+        self.assertEqual(versions[0], versions[1])
+        self.in_worker(self.workers[1], catalog.invalidate_catalog)
+        self.assertEqual(self.in_worker(self.workers[0], catalog.catalog_version), versions[0] + 1)
+
+    @override_settings(CACHE_VERSION_TTL=0)
+    def test_profile_invalidation_reaches_other_workers(self):
+        user_id = self.job.posted_by_id
+        keys = [self.in_worker(worker, result_cache.result_key, user_id, None, 0) for worker in self.workers]
+        self.assertEqual(keys[0], keys[1])
+        self.in_worker(self.workers[1], result_cache.invalidate_profile, user_id)
+        self.assertNotEqual(self.in_worker(self.workers[0], result_cache.result_key, user_id, None, 0), keys[0])
+
+
+class RecommendationTests(JobCatalogFixture, TestCase):
+    JOB_COUNT = 60
+
+    def test_recommend_jobs(self):
+        with tempfile.TemporaryDirectory() as index_dir, override_settings(RECOMMENDER_INDEX_DIR=index_dir):
+            recommender.rebuild_job_index()
+            client = APIClient()
+            client.force_authenticate(self.employee)
+            # user, profile, preferences, seeding the profile version (three
+            # queries), then the three catalog queries. The rebuild seeded the
+            # catalog version and checked the index against it.
+            with self.assertNumQueries(9):
+                response = client.get("/api/recommend_jobs/", {"user_id": self.employee.id})
+            top = client.get("/api/recommend_jobs/", {"user_id": self.employee.id, "limit": 5, "offset": 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({job["color"] for job in response.json()}, {"Green", "Yellow"})
+        self.assertEqual(top.json(), response.json()[10:15])
+        self.assertEqual(top["X-Total-Count"], str(len(response.json())))
+
+    def test_recommendation_cache(self):
+        with tempfile.TemporaryDirectory() as index_dir, override_settings(RECOMMENDER_INDEX_DIR=index_dir):
+            recommender.rebuild_job_index()
+            client = APIClient()
+            client.force_authenticate(self.employee)
+            params = {"user_id": self.employee.id, "limit": 10}
+            first = client.get("/api/recommend_jobs/", params)
+            with self.assertNumQueries(0):
+                cached = client.get("/api/recommend_jobs/", params)
+            self.assertEqual(cached.content, first.content)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post("/api/save-preferences/", {"tags": []}, format="json")
+            response = client.get("/api/recommend_jobs/", params)
+            # Without preferences only skill matches (Yellow) are left.
+            self.assertEqual({job["color"] for job in response.json()}, {"Yellow"})
+
+    def test_precompute_recommendations(self):
+        with tempfile.TemporaryDirectory() as index_dir, override_settings(RECOMMENDER_INDEX_DIR=index_dir):
+            recommender.rebuild_job_index()
+            client = APIClient()
+            client.force_authenticate(self.employee)
+            live = client.get("/api/recommend_jobs/", {"user_id": self.employee.id}).json()
+
+            call_command("precompute_recommendations", top_k=20, workers=1, stdout=io.StringIO())
+            stored = JobRecommendation.objects.filter(user=self.employee)
+            self.assertEqual(
+                list(stored.values_list("job_post_id", flat=True)),
+                [job["post_id"] for job in live[:20]],
+            )
+
+            result_cache.results.clear()
+            with override_settings(SERVE_PRECOMPUTED_RECOMMENDATIONS=True):
+                response = client.get("/api/recommend_jobs/", {"user_id": self.employee.id, "limit": 5, "offset": 5})
+            self.assertEqual(response.json(), live[5:10])
+            self.assertEqual(response["X-Total-Count"], "20")
+
+    def test_job_candidates(self):
+        job = JobPost.objects.order_by("post_id").first()
+        with tempfile.TemporaryDirectory() as index_dir, override_settings(RECOMMENDER_INDEX_DIR=index_dir):
+            call_command("rebuild_job_index", stdout=io.StringIO())
+            client = APIClient()
+            client.force_authenticate(self.employee)
+            recommended = {
+                row["post_id"]: row
+                for row in client.get("/api/recommend_jobs/", {"user_id": self.employee.id}).json()
+            }
+
+            client.force_authenticate(job.posted_by)
+            response = client.get(f"/api/job/{job.post_id}/candidates/")
+            self.assertEqual(response.status_code, 200)
+            [candidate] = response.json()
+            self.assertEqual(candidate["user_id"], self.employee.id)
+            self.assertAlmostEqual(candidate["similarity_score"], recommended[job.post_id]["similarity_score"])
+            self.assertEqual(candidate["color"], recommended[job.post_id]["color"])
+
+            # New activated profiles are indexed once their transaction commits.
+            other = User.objects.create(username="seeker2", user_type="Employee")
+            with self.captureOnCommitCallbacks(execute=True):
+                EmployeeProfile.objects.create(user=other, user_disability="Visual", skills="python", activated=True)
+            response = client.get(f"/api/job/{job.post_id}/candidates/")
+            self.assertEqual([row["user_id"] for row in response.json()], [self.employee.id, other.id])
+            self.assertEqual(response["X-Total-Count"], "2")
+
+            # A profile whose on-commit refresh failed is picked up once the profiles version moves...
+            third = User.objects.create(username="seeker3", user_type="Employee")
+            with mock.patch.object(candidates.profile_store, "refresh", side_effect=OSError("worker died")), \
+                    self.assertLogs("hanapwedeApp.signals"), self.captureOnCommitCallbacks(execute=True):
+                EmployeeProfile.objects.create(user=third, user_disability="Visual", skills="python", activated=True)
+            response = client.get(f"/api/job/{job.post_id}/candidates/")
+            self.assertEqual(response["X-Total-Count"], "3")
+
+            # ...and one deactivated without any signal is dropped as soon as it would be shown.
+            EmployeeProfile.objects.filter(user__in=[other, third]).update(activated=False)
+            response = client.get(f"/api/job/{job.post_id}/candidates/")
+            self.assertEqual([row["user_id"] for row in response.json()], [self.employee.id])
+            self.assertEqual(response["X-Total-Count"], "1")
+
+            client.force_authenticate(User.objects.get(username="employer1"))
+            self.assertEqual(client.get(f"/api/job/{job.post_id}/candidates/").status_code, 403)
+            client.force_authenticate(User.objects.create(username="admin", user_type="Admin"))
+            self.assertEqual(client.get(f"/api/job/{job.post_id}/candidates/").status_code, 200)
+
+
+def baseline_filters(job, preferred_tag_names, user_disability, user_skills):
+    """
+    (disability_match, pref_match, skill_match, colour or None) for one job,
+    computed the way recommend_jobs did per row before the job index.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    user_disability = user_disability.lower()
+    user_skills = [s.strip().lower() for s in user_skills.split(",")]
+    preferred = [tag.lower() for tag in preferred_tag_names]
+    job_disabilities = ", ".join(job["disabilitytag"]).lower().split(", ")
+    job_skills = [s.strip().lower() for s in job["skills_required"].split(",")] if job["skills_required"] else []
+    job_tags = ", ".join(job["tags"]).lower().split(", ")
+
+    skill_match = False
+    if user_skills and job_skills:
+        all_skills = user_skills + job_skills
+        vectors = TfidfVectorizer().fit(all_skills).transform(all_skills)
+        skill_match = bool(cosine_similarity(vectors[:len(user_skills)], vectors[len(user_skills):]).max() > 0.5)
+    disability_match = any(user_disability in jd or jd in user_disability for jd in job_disabilities)
+    pref_match = any(utag in jtag or jtag in utag for utag in preferred for jtag in job_tags)
+
+    color = None
+    if disability_match and (skill_match or pref_match):
+        color = "Green" if skill_match and pref_match else "Yellow" if skill_match else "Red"
+    return disability_match, pref_match, skill_match, color
+
+
+class JobIndexTests(TestCase):
+    """The persisted job index against a small catalog, in a fresh index dir per test."""
+
+    DOCUMENTS = [
+        ("Python developer for internal tools", "python, django", "IT", ["IT"], ["Visual"]),
+        ("Answer customer support calls", "customer support, communication", "Service", [], ["Hearing"]),
+        ("Nurse for the night shift", "patient care", "Health", ["Health"], []),
+        ("Data entry from home", "excel, data entry", "IT", ["IT", "Health"], ["Visual", "Hearing"]),
+        ("Remote python support engineer", "python, customer support", None, ["IT"], ["Visual"]),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create(username="employer", user_type="Employer")
+        tags = {name: Tag.objects.create(name=name) for name in ("IT", "Health")}
+        disability_tags = {name: DisabilityTag.objects.create(name=name) for name in ("Visual", "Hearing")}
+        for i, (desc, skills, category, tag_names, disability_names) in enumerate(cls.DOCUMENTS):
+            job = JobPost.objects.create(
+                posted_by=employer, job_title=f"Job {i}", job_desc=desc, skills_req=skills, category=category,
+                location="Manila",
+            )
+            job.tags.set([tags[name] for name in tag_names])
+            job.disabilitytag.set([disability_tags[name] for name in disability_names])
+
+    def setUp(self):
+        index_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(index_dir.cleanup)
+        index_settings = override_settings(RECOMMENDER_INDEX_DIR=index_dir.name)
+        index_settings.enable()
+        self.addCleanup(index_settings.disable)
+
+    def create_job(self, desc):
+        return JobPost.objects.create(
+            posted_by=User.objects.get(username="employer"), job_title=desc, job_desc=desc, skills_req="python",
+        )
+
+    def assert_matches_refit(self, index, documents):
+        """`index`'s TF-IDF rows equal a TfidfVectorizer fitted from scratch on `documents`."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        for name, vectorizer, docs in [
+            ("text", TfidfVectorizer(stop_words="english"), [recommender.job_document(job) for job in documents]),
+            # One row per skill phrase.
+            ("skills", TfidfVectorizer(),
+             [phrase for job in documents for phrase in recommender.skill_phrases(job["skills_required"])]),
+        ]:
+            term_index = getattr(index, name)
+            expected = vectorizer.fit_transform(docs).toarray()
+            columns = [term_index.vocabulary[term] for term in vectorizer.get_feature_names_out()]
+            actual = term_index.tfidf().toarray()
+            np.testing.assert_allclose(actual[:, columns], expected, atol=1e-12)
+            # Terms only removed jobs used carry no weight.
+            self.assertEqual(np.count_nonzero(np.delete(actual, columns, axis=1)), 0)
+            query = ["python customer support for a remote team"]
+            np.testing.assert_allclose(
+                term_index.transform(query).toarray()[:, columns], vectorizer.transform(query).toarray(), atol=1e-12
+            )
+
+    def test_incremental_index_matches_refit(self):
+        jobs = recommender.load_job_documents()
+        index = recommender.JobIndex()
+        index.upsert(jobs[:3])
+        index.upsert(jobs[3:])
+        self.assert_matches_refit(index, jobs)
+
+        # Edit one job, drop two: rows follow the index's own order.
+        edited = dict(jobs[0], job_description="Senior python developer", skills_required="python, sql")
+        index.upsert([edited])
+        index.remove([jobs[1]["post_id"], jobs[3]["post_id"]])
+        remaining = {job["post_id"]: job for job in [edited, jobs[2], jobs[4]]}
+        self.assert_matches_refit(index, [remaining[post_id] for post_id in index.post_ids.tolist()])
+
+        path = os.path.join(settings.RECOMMENDER_INDEX_DIR, "copy.npz")
+        index.save(path)
+        loaded = recommender.JobIndex.load(path)
+        self.assert_matches_refit(loaded, [remaining[post_id] for post_id in loaded.post_ids.tolist()])
+
+    def test_signals_update_persisted_index(self):
+        recommender.rebuild_job_index()
+
+        def indexed(post_id):
+            index = recommender.JobIndex.load(recommender.index_path())
+            row = index.positions([post_id])[0]
+            if row < 0:
+                return None
+            tags = index.tags.counts[row].indices
+            return {index.tags.terms[col] for col in tags}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job = self.create_job("Python tutor")
+        self.assertEqual(indexed(job.post_id), set())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job.tags.add(Tag.objects.get(name="Health"))
+        self.assertEqual(indexed(job.post_id), {"health"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.filter(name="Health").update(name="Healthcare")
+            tag = Tag.objects.get(name="Healthcare")
+            tag.save()
+        self.assertEqual(indexed(job.post_id), {"healthcare"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post_id = job.post_id
+            job.delete()
+        self.assertIsNone(indexed(post_id))
+
+    def test_writers_do_not_change_served_index(self):
+        served = recommender.get_job_index()
+        state = {name: getattr(served, name).state(name) for name in served.term_indexes}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_job("Python tutor with brand new words")
+            JobPost.objects.order_by("post_id").first().delete()
+        self.assertIsNot(recommender.get_job_index(), served)
+        self.assertEqual(len(recommender.get_job_index()), len(served))
+
+        # A request still holding the old index sees it exactly as it was.
+        for name, before in state.items():
+            after = getattr(served, name).state(name)
+            for field, value in before.items():
+                np.testing.assert_array_equal(after[field], value, err_msg=field)
+
+    # (preferred tag names, disability, skills): exact and partial tag names,
+    # no preferences, a disability that contains a tag name, and no skills.
+    PROFILES = [
+        (["IT"], "Visual", "python"),
+        ([], "Hearing", "customer support, excel"),
+        (["health", "I"], "Visual impairment", "patient care, django"),
+        (["Healthcare"], "", ""),
+        (["Service"], "Hearing", "communication"),
+    ]
+
+    def test_vectorized_filters_match_baseline(self):
+        jobs = recommender.load_job_documents()
+        index = recommender.rebuild_job_index()
+        rows = index.positions([job["post_id"] for job in jobs])
+        seen_colors = set()
+
+        for profile in self.PROFILES:
+            with self.subTest(profile=profile):
+                _, included, colors, disability_match = index.match(*profile)
+                pref_match = index.preference_match(profile[0])
+                expected = [baseline_filters(job, *profile) for job in jobs]
+                self.assertEqual(disability_match[rows].tolist(), [e[0] for e in expected])
+                self.assertEqual(pref_match[rows].tolist(), [e[1] for e in expected])
+                self.assertEqual(
+                    [str(colors[row]) if included[row] else None for row in rows.tolist()],
+                    [e[3] for e in expected],
+                )
+                seen_colors.update(e[3] for e in expected)
+        # The fixture exercises every bucket, exclusion included.
+        self.assertEqual(seen_colors, {"Green", "Yellow", "Red", None})
+
+    def test_skill_index_matches_per_job_fit(self):
+        jobs = recommender.load_job_documents()
+        index = recommender.rebuild_job_index()
+        rows = index.positions([job["post_id"] for job in jobs])
+
+        for skills in ["python", "Customer Support", "excel, nursing", "data entry", "django, communication", "", "cooking"]:
+            with self.subTest(skills=skills):
+                self.assertEqual(
+                    index.skill_match(skills)[rows].tolist(),
+                    [baseline_filters(job, [], "", skills)[2] for job in jobs],
+                )
+
+        # A batch of profiles scores each one as if it were ranked alone.
+        for profile, batched in zip(self.PROFILES, index.match_many(self.PROFILES)):
+            for single, many in zip(index.match(*profile), batched):
+                np.testing.assert_array_equal(single, many)
+
+    def test_top_rows_matches_full_sort(self):
+        rng = np.random.default_rng(0)
+        # Few distinct scores, so the k-th score is usually tied.
+        scores = rng.integers(0, 4, 200).astype(float)
+        included = rng.random(200) < 0.7
+        keys = rng.permutation(1000)[:200]
+        rows = np.flatnonzero(included)
+        ranked = rows[np.lexsort((keys[rows], -scores[rows]))]
+        for k in [None, 0, 1, 5, 37, len(rows), len(rows) + 5]:
+            expected = ranked if k is None else ranked[:k]
+            self.assertEqual(recommender.top_rows(scores, included, keys, k).tolist(), expected.tolist())
+
+    def test_writers_take_turns(self):
+        recommender.rebuild_job_index()
+        first, second = self.create_job("Python tutor"), self.create_job("Python reviewer")
+        # Another worker: its own IndexStore, so its own flock on the lock file.
+        rows = recommender.load_job_documents([second.post_id])
+        other = recommender.IndexStore(
+            recommender.JobIndex, "job_index.npz", lambda keys=None: rows, recommender.job_store.key
+        )
+        other.get()
+
+        with recommender.job_store._writing():
+            writer = threading.Thread(target=other.refresh, args=([second.post_id],))
+            writer.start()
+            writer.join(0.3)
+            self.assertTrue(writer.is_alive())
+            recommender.refresh_jobs([first.post_id])
+        writer.join(10)
+
+        index = recommender.JobIndex.load(recommender.index_path())
+        self.assertTrue((index.positions([first.post_id, second.post_id]) >= 0).all())
+        self.assertEqual(len(index), len(self.DOCUMENTS) + 2)
+
+    def test_failed_refresh_does_not_fail_the_request(self):
+        job = JobPost.objects.order_by("post_id").first()
+        with mock.patch.object(recommender, "refresh_jobs", side_effect=OSError("disk full")), \
+                self.assertLogs("hanapwedeApp.signals", "ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                job.job_desc = "Edited"
+                job.save()
+        self.assertEqual(JobPost.objects.get(pk=job.pk).job_desc, "Edited")
+
+    def test_lost_refreshes_are_repaired(self):
+        recommender.rebuild_job_index()
+        # The catalog has not changed since: only its (cached) version is read.
+        with self.assertNumQueries(0):
+            recommender.get_current_job_index()
+
+        deleted = JobPost.objects.order_by("post_id").first()
+        deleted_id = deleted.post_id
+        with mock.patch.object(recommender, "job_store") as job_store, self.assertLogs("hanapwedeApp.signals"):
+            with self.captureOnCommitCallbacks(execute=True):
+                job_store.refresh.side_effect = job_store.remove.side_effect = OSError("worker died")
+                added = self.create_job("added")
+                deleted.delete()
+        self.assertIn(deleted_id, recommender.get_job_index().post_ids)
+        self.assertNotIn(added.post_id, recommender.get_job_index().post_ids)
+
+        with self.assertLogs("hanapwedeApp.recommender", "WARNING"):
+            index = recommender.get_current_job_index()
+        self.assertEqual(sorted(index.post_ids), sorted(JobPost.objects.values_list("post_id", flat=True)))
+        self.assertEqual(recommender.JobIndex.load(recommender.index_path()).checked_version, catalog.catalog_version())
+        with self.assertNumQueries(0):
+            self.assertIs(recommender.get_current_job_index(), index)
+
+
+class SyntheticDataTests(TestCase):
+    def test_generate_synthetic_data(self):
+        with tempfile.TemporaryDirectory() as index_dir, override_settings(RECOMMENDER_INDEX_DIR=index_dir):
+            call_command(
+                "generate_synthetic_data", employers=3, employees=10, jobs=50, chat_rooms=4, posts=2,
+                chunk_size=7, stdout=io.StringIO(),
+            )
+            self.assertEqual(JobPost.objects.filter(posted_by__username__startswith="synth_").count(), 50)
+            self.assertEqual(EmployeeProfile.objects.filter(user__username__startswith="synth_").count(), 10)
+            self.assertEqual(len(recommender.get_job_index()), 50)
+
+
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.stats.clear()
+
+    def test_request_instrumentation(self):
+        with override_settings(REQUEST_INSTRUMENTATION=True):
+            client = APIClient()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get("/api/all-jobs-public/")
+            query_count = len(queries)
+            self.assertIn('db;dur=', response["Server-Timing"])
+            self.assertIn(f'desc="{query_count} queries"', response["Server-Timing"])
+
+            client.force_authenticate(User.objects.create(username="seeker", user_type="Employee"))
+            self.assertEqual(client.get("/api/admin/request-stats/").status_code, 403)
+
+            admin = User.objects.create(username="admin", user_type="Admin")
+            client.force_authenticate(admin)
+            views = client.get("/api/admin/request-stats/").json()["views"]
+        self.assertEqual(views["get_all_jobs_public"]["requests"], 1)
+        self.assertEqual(views["get_all_jobs_public"]["avg_queries"], query_count)
+        self.assertEqual(sum(views["get_all_jobs_public"]["histogram"].values()), 1)
+
+
+class EvaluationTests(SimpleTestCase):
+    def test_ranking_metrics(self):
+        import evaluate
+
+        # One user applied for their first-ranked job; the other for two jobs,
+        # one of them ranked second.
+        hits = np.array([[True, False], [False, True]])
+        n_relevant = np.array([1, 2])
+        at_1 = evaluate.ranking_metrics(hits, n_relevant, 1)
+        self.assertEqual(at_1, {"precision": 0.5, "recall": 0.5, "ndcg": 0.5})
+
+        at_2 = evaluate.ranking_metrics(hits, n_relevant, 2)
+        self.assertAlmostEqual(at_2["precision"], 0.5)
+        self.assertAlmostEqual(at_2["recall"], (1 + 1 / 2) / 2)
+        # NDCG of the second user: (1 / log2(3)) / (1 + 1 / log2(3)).
+        self.assertAlmostEqual(at_2["ndcg"], (1 + 0.63093 / 1.63093) / 2, places=5)
+
+    def test_latency_summary(self):
+        summary = instrumentation.latency_summary([0.001, 0.002, 0.003])
+        self.assertAlmostEqual(summary["mean_ms"], 2)
+        self.assertAlmostEqual(summary["p50_ms"], 2)
+        self.assertAlmostEqual(summary["p99_ms"], 2.98)
+
+
+class OCRJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create(username="seeker", user_type="Employee")
+
+    @override_settings(OCR_BACKEND="inline")
+    def test_ocr_jobs(self):
+        client = APIClient()
+        image = SimpleUploadedFile("card.png", b"image bytes", content_type="image/png")
+        with mock.patch("hanapwedeApp.ocr.recognize", return_value="ID NO 0123-4567"):
+            response = client.post("/api/ocr/", {"image": image}, format="multipart")
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(job["status"], "done")
+
+        response = client.get(f"/api/ocr/{job['job_id']}/")
+        self.assertEqual(response.json()["text"], "ID NO 0123-4567")
+
+        # The same bytes again come from the content-hash cache.
+        image = SimpleUploadedFile("copy.png", b"image bytes", content_type="image/png")
+        with mock.patch("hanapwedeApp.ocr.recognize") as recognize:
+            job = client.post("/api/ocr/", {"image": image}, format="multipart").json()
+        recognize.assert_not_called()
+        self.assertEqual((job["status"], job["text"]), ("done", "ID NO 0123-4567"))
+
+        with override_settings(OCR_CACHE_MAX_ENTRIES=1), mock.patch("hanapwedeApp.ocr.recognize", return_value=""):
+            client.post("/api/ocr/", {"image": SimpleUploadedFile("b.png", b"other bytes")}, format="multipart")
+        self.assertEqual(list(OCRResult.objects.values_list("text", flat=True)), [""])
+
+        image = SimpleUploadedFile("card.png", b"not an image", content_type="image/png")
+        with mock.patch("hanapwedeApp.ocr.recognize", side_effect=OSError("cannot identify image file")):
+            job = client.post("/api/ocr/", {"image": image}, format="multipart").json()
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "cannot identify image file")
+
+    @override_settings(OCR_BACKEND="inline")
+    def test_pwd_card_checks(self):
+        from PIL import Image
+
+        def card(color):
+            buffer = io.BytesIO()
+            Image.new("RGB", (856, 540), color).save(buffer, "PNG")
+            return SimpleUploadedFile("card.png", buffer.getvalue(), content_type="image/png")
+
+        reader = mock.Mock()
+        reader.readtext_batched.return_value = [["ID NO.", "13-7404-000-0000001"], ["ID NO.", "99-9999-999"]]
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username="admin", user_type="Admin"))
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            for username, id_no, color in [("pending1", "13-7404-000-0000001", "white"),
+                                           ("pending2", "1234567", "gray"), ("pending3", "7654321", None)]:
+                user = User.objects.create(username=username, user_type="Employee")
+                EmployeeProfile.objects.create(user=user, ID_no=id_no, activated=False)
+                if color:
+                    PWDCard.objects.create(user=user, image=card(color))
+
+            with mock.patch("hanapwedeApp.ocr.get_reader", return_value=reader):
+                rows = client.get("/api/admin/pending-users/card-checks/").json()
+                again = client.get("/api/admin/pending-users/card-checks/").json()
+
+        self.assertEqual(reader.readtext_batched.call_count, 1)
+        self.assertEqual(len(reader.readtext_batched.call_args.args[0]), 2)
+        # The second call is answered from the OCR cache, without inference.
+        for response in (rows, again):
+            self.assertEqual([(row["status"], row.get("id_match")) for row in response],
+                             [("done", True), ("done", False), ("no_card", None)])
+        self.assertEqual(rows[0]["id_numbers"], ["1374040000000001"])
+
+        client.force_authenticate(self.employee)
+        self.assertEqual(client.get("/api/admin/pending-users/card-checks/").status_code, 403)
+
+    @override_settings(OCR_BACKEND="process")
+    def test_broken_worker_pool(self):
+        client = APIClient()
+        queue = ocr_jobs.OCRQueue()
+        broken = Future()
+        broken.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+        done = Future()
+        done.set_result(["ID NO 0123-4567"])
+        pools = [mock.Mock(**{"submit.side_effect": BrokenProcessPool}), mock.Mock(**{"submit.return_value": broken}),
+                 mock.Mock(**{"submit.return_value": done})]
+
+        def post(content):
+            image = SimpleUploadedFile("card.png", content, content_type="image/png")
+            return client.post("/api/ocr/", {"image": image}, format="multipart")
+
+        with mock.patch.object(ocr_jobs, "queue", queue), \
+                mock.patch.object(ocr_jobs, "ProcessPoolExecutor", side_effect=pools):
+            # The pool broke before the job was handed over.
+            response = post(b"first")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(OCRJob.objects.get().status, "failed")
+
+            # It broke while running the job; the job fails instead of staying pending.
+            job = post(b"second").json()
+            self.assertEqual((job["status"], job["error"]), ("failed", "OCR worker stopped unexpectedly"))
+
+            # Each broken pool was shut down and the next job got a new one.
+            job = post(b"third").json()
+            self.assertEqual((job["status"], job["text"]), ("done", "ID NO 0123-4567"))
+        for pool in pools[:2]:
+            pool.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        self.assertIs(queue._executor, pools[2])
+
+
+class StartupTests(SimpleTestCase):
+    def test_startup_skips_ml_libraries(self):
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "benchmark_startup", repeat=1, scenarios=["urls", "recommender"], output=output.name,
+                stdout=io.StringIO(),
+            )
+            scenarios = json.load(output)["scenarios"]
+        self.assertNotIn("sklearn", scenarios["urls"]["heavy_modules"])
+        self.assertIn("sklearn", scenarios["recommender"]["heavy_modules"])
+
+
+class ChatHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create(username="seeker", user_type="Employee")
+        for i in range(6):
+            User.objects.create(username=f"employer{i}", user_type="Employer")
+
+    def test_chat_history_pages(self):
+        employer = User.objects.get(username="employer0")
+        room = ChatRooms.objects.create(employee=self.employee, employer=employer)
+        Messages.objects.bulk_create([
+            Messages(room=room, sender=self.employee if i % 2 else employer, content=str(i)) for i in range(7)
+        ])
+        client = APIClient()
+        client.force_authenticate(self.employee)
+        url = f"/api/chat/messages/{room.id}/"
+
+        with self.assertNumQueries(2):
+            latest = client.get(url, {"limit": 3}).json()
+        self.assertEqual([m["content"] for m in latest["messages"]], ["4", "5", "6"])
+        self.assertTrue(latest["has_more"])
+        self.assertEqual(latest["other_user"]["username"], "employer0")
+
+        older = client.get(url, {"limit": 3, "before": latest["messages"][0]["id"]}).json()
+        self.assertEqual([m["content"] for m in older["messages"]], ["1", "2", "3"])
+        oldest = client.get(url, {"limit": 3, "before": older["messages"][0]["id"]}).json()
+        self.assertEqual(([m["content"] for m in oldest["messages"]], oldest["has_more"]), (["0"], False))
+
+        Messages.objects.create(room=room, sender=employer, content="7")
+        delta = client.get(url, {"after": latest["messages"][-1]["id"]}).json()
+        self.assertEqual(([m["content"] for m in delta["messages"]], delta["has_more"]), (["7"], False))
+
+    def test_inbox_query_count(self):
+        rooms = [ChatRooms.objects.create(employee=self.employee, employer=User.objects.get(username=f"employer{i}"))
+                 for i in range(6)]
+        # Room 0 has no messages; the others are active in reverse order.
+        base = timezone.now() - timedelta(hours=1)
+        Messages.objects.bulk_create(
+            Messages(room=room, sender=room.employer, content=f"{i}-{n}", timestamp=base - timedelta(minutes=i * 10 - n))
+            for i, room in enumerate(rooms[1:], 1) for n in range(3)
+        )
+        client = APIClient()
+        client.force_authenticate(self.employee)
+
+        with self.assertNumQueries(1):
+            first = client.get("/api/user-chats/", {"limit": 4}).json()
+        self.assertEqual([chat["room_id"] for chat in first["chats"]], [r.id for r in rooms[:4]])
+        self.assertEqual(first["chats"][0]["last_message"], "No messages yet")
+        self.assertEqual((first["chats"][1]["other_user"], first["chats"][1]["last_message"]), ("employer1", "1-2"))
+        self.assertTrue(first["has_more"])
+
+        with self.assertNumQueries(2):
+            rest = client.get("/api/user-chats/", {"limit": 4, "before": first["chats"][-1]["room_id"]}).json()
+        self.assertEqual([chat["room_id"] for chat in rest["chats"]], [r.id for r in rooms[4:]])
+        self.assertFalse(rest["has_more"])
+
+
+class ChatUnreadTests(TestCase):
+    """Unread counters and read cursors, without a channel layer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create(username="chat_employee", user_type="Employee")
+        cls.employer = User.objects.create(username="chat_employer", user_type="Employer")
+        cls.room = ChatRooms.objects.create(employee=cls.employee, employer=cls.employer)
+
+    def message(self, content, **kwargs):
+        return Messages(room=self.room, sender=self.employee, content=content, **kwargs)
+
+    def test_unread_counters(self):
+        [event] = save_messages([self.message("hi"), self.message("there")])
+        self.assertEqual((event["type"], event["unread"]), ("chat_unread", {"chat_employee": 0, "chat_employer": 2}))
+
+        event = mark_read(self.room.id, self.employer.id)
+        self.assertEqual(event["unread"], {"chat_employee": 0, "chat_employer": 0})
+        self.assertIsNotNone(event["read_at"]["chat_employer"])
+        outsider = User.objects.create(username="chat_outsider", user_type="Employee")
+        self.assertIsNone(mark_read(self.room.id, outsider.id))
+
+        # Saved late, but sent before the employer read the room: not unread.
+        self.room.refresh_from_db()
+        save_messages([
+            self.message("late", timestamp=self.room.employer_read_at - timedelta(seconds=1)),
+            self.message("new"),
+        ])
+        client = APIClient()
+        client.force_authenticate(self.employer)
+        chats = client.get("/api/user-chats/").json()["chats"]
+        self.assertEqual((chats[0]["last_message"], chats[0]["unread"]), ("new", 1))
+
+    def test_read_cursor_is_not_in_the_future(self):
+        event = mark_read(self.room.id, self.employer.id, timezone.now() + timedelta(days=1))
+        self.assertLessEqual(datetime.fromisoformat(event["read_at"]["chat_employer"]), timezone.now())
+        [event] = save_messages([self.message("sent after the read")])
+        self.assertEqual(event["unread"]["chat_employer"], 1)
+
+
+class ChatConsumerTests(SimpleTestCase):
+    def test_disconnect_after_failed_membership_check(self):
+        consumer = ChatConsumer()
+        consumer.scope = {"url_route": {"kwargs": {"room_name": "1"}}, "user": AnonymousUser()}
+
+        async def connect_and_drop():
+            with self.assertRaises(DatabaseError):
+                await consumer.connect()
+            # The server still sends websocket.disconnect.
+            await consumer.disconnect(1006)
+
+        with mock.patch.object(ChatConsumer, "check_membership", side_effect=DatabaseError("gone away")):
+            async_to_sync(connect_and_drop)()
+        self.assertFalse(consumer.is_member)
+
+
+class OCRPreprocessTests(SimpleTestCase):
+    def photo(self, size, orientation):
+        from PIL import Image
+
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        buffer = io.BytesIO()
+        Image.new("RGB", size, "white").save(buffer, "JPEG", exif=exif)
+        return buffer.getvalue()
+
+    def test_upright_downscaled_grayscale(self):
+        # A portrait phone photo stored sideways, rotated by its EXIF tag.
+        image = ocr.load_image(self.photo((4000, 3000), 6), max_side=1280, grayscale=True)
+        self.assertEqual(image.shape, (1280, 960))
+
+    def test_region_crop(self):
+        image = ocr.load_image(self.photo((2000, 1000), 1), max_side=1280, region=(0.5, 0, 1, 0.5))
+        self.assertEqual(image.shape, (500, 1000, 3))
+
+    def test_threshold(self):
+        image = ocr.load_image(self.photo((100, 100), 1), threshold=128)
+        self.assertEqual(set(image.ravel().tolist()) - {0, 255}, set())
+
+
+# A chat worker: joins the room's group through the configured layer, then
+# prints the first message it receives.
+CHAT_WORKER = """
+import asyncio
+import django
+
+django.setup()
+from channels.layers import get_channel_layer
+
+
+async def main():
+    layer = get_channel_layer()
+    channel = await layer.new_channel()
+    await layer.group_add("chat_1", channel)
+    print("ready", type(layer).__name__, flush=True)
+    message = await asyncio.wait_for(layer.receive(channel), 20)
+    print(message["message"], flush=True)
+
+
+asyncio.run(main())
+"""
+
+
+@skipUnless(TcpFakeServer, "fakeredis is not installed")
+class ChatChannelLayerTests(TestCase):
+    """ChatConsumer fan-out through the Redis layer, against an in-process fakeredis server."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        cls.server = TcpFakeServer(("127.0.0.1", port))
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.redis_url = f"redis://127.0.0.1:{port}/0"
+        cls.layers = override_settings(CHANNEL_LAYERS={
+            "default": {
+                "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+                "CONFIG": {"hosts": [cls.redis_url]},
+            }
+        })
+        cls.layers.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.layers.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_fan_out_across_processes(self):
+        env = {
+            **os.environ,
+            "CHANNEL_REDIS_URL": self.redis_url,
+            "PYTHONPATH": os.pathsep.join(path for path in sys.path if path),
+        }
+        workers = [
+            subprocess.Popen([sys.executable, "-c", CHAT_WORKER], stdout=subprocess.PIPE, text=True, env=env,
+                             cwd=settings.BASE_DIR)
+            for _ in range(2)
+        ]
+        try:
+            for worker in workers:
+                self.assertEqual(worker.stdout.readline().split(), ["ready", "RedisPubSubChannelLayer"])
+            async_to_sync(get_channel_layer().group_send)("chat_1", {"type": "chat_message", "message": "hello"})
+            for worker in workers:
+                self.assertEqual(worker.stdout.readline().strip(), "hello")
+                self.assertEqual(worker.wait(timeout=20), 0)
+        finally:
+            for worker in workers:
+                worker.kill()
+                worker.stdout.close()
+
+    def setUp(self):
+        self.employee = User.objects.create(username="chat_employee", user_type="Employee")
+        self.employer = User.objects.create(username="chat_employer", user_type="Employer")
+        self.room = ChatRooms.objects.create(employee=self.employee, employer=self.employer)
+
+    def socket(self, user=None, room=None):
+        """A communicator for `room` (default: self.room), signed in with `user`'s token."""
+        path = f"/ws/chat/{(room or self.room).id}/"
+        if user is not None:
+            path += f"?token={Token.objects.get_or_create(user=user)[0].key}"
+        return WebsocketCommunicator(TokenAuthMiddleware(URLRouter(websocket_urlpatterns)), path)
+
+    def test_handshake_requires_participant(self):
+        outsider = User.objects.create(username="chat_outsider", user_type="Employee")
+        other_room = ChatRooms.objects.create(employee=outsider, employer=self.employer)
+
+        async def connect(communicator):
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        self.assertFalse(async_to_sync(connect)(self.socket()))
+        self.assertFalse(async_to_sync(connect)(self.socket(outsider)))
+        self.assertFalse(async_to_sync(connect)(self.socket(self.employee, other_room)))
+        self.assertTrue(async_to_sync(connect)(self.socket(self.employee)))
+
+    def test_consumers_share_room(self):
+        room = self.room
+
+        sockets = [self.socket(self.employee), self.socket(self.employer)]
+
+        async def chat():
+            for communicator in sockets:
+                connected, _ = await communicator.connect()
+                self.assertTrue(connected)
+            # The sender is the socket's user, whatever the payload claims.
+            await sockets[0].send_json_to({"message": "hi", "sender": "chat_employer"})
+            received = [await communicator.receive_json_from(timeout=5) for communicator in sockets]
+            for communicator in sockets:
+                await communicator.disconnect()
+            return received
+
+        received = async_to_sync(chat)()
+        for event in received:
+            self.assertEqual((event["message"], event["sender"]), ("hi", "chat_employee"))
+        # Saved behind the broadcast, at the latest when the socket closed.
+        message = Messages.objects.get(room=room)
+        self.assertEqual((message.content, message.sender_id), ("hi", self.employee.id))
+        self.assertEqual(str(message.timestamp), received[0]["timestamp"])
+
+    def test_message_writer_batches(self):
+        employee, room = self.employee, self.room
+
+        async def write():
+            for i in range(5):
+                message_writer.add(Messages(room_id=room.id, sender_id=employee.id, content=str(i)))
+            await message_writer.flush()
+
+        with override_settings(CHAT_WRITE_BATCH_SIZE=2), \
+                mock.patch("hanapwedeApp.ChatConsumer.save_messages", wraps=save_messages) as save:
+            async_to_sync(write)()
+        self.assertEqual([len(call.args[0]) for call in save.call_args_list], [2, 2, 1])
+        self.assertEqual(list(Messages.objects.filter(room=room).values_list("content", flat=True).order_by("id")),
+                         ["0", "1", "2", "3", "4"])
+
+    def test_unread_counters(self):
+        employee, employer = self.employee, self.employer
+
+        sockets = [self.socket(employee), self.socket(employer)]
+
+        async def chat():
+            for communicator in sockets:
+                await communicator.connect()
+            await sockets[0].send_json_to({"message": "hi"})
+            for communicator in sockets:
+                await communicator.receive_json_from(timeout=5)
+            await message_writer.flush()
+            saved = [await communicator.receive_json_from(timeout=5) for communicator in sockets]
+            await sockets[1].send_json_to({"type": "read"})
+            read = [await communicator.receive_json_from(timeout=5) for communicator in sockets]
+            for communicator in sockets:
+                await communicator.disconnect()
+            return saved, read
+
+        saved, read = async_to_sync(chat)()
+        for event in saved:
+            self.assertEqual((event["type"], event["unread"]), ("chat_unread", {"chat_employee": 0, "chat_employer": 1}))
+        for event in read:
+            self.assertEqual(event["unread"], {"chat_employee": 0, "chat_employer": 0})
+            self.assertIsNotNone(event["read_at"]["chat_employer"])
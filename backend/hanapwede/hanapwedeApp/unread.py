@@ -0,0 +1,108 @@
+"""
+Read cursors and unread counters of chat rooms.
+
+Each participant of a ChatRooms row has a read cursor (employee_read_at /
+employer_read_at: the timestamp of the newest message they have seen) and
+an unread counter. Counters are kept up to date as messages are saved and
+as participants acknowledge what they have read; changes are pushed to the
+room's channel group as a "chat_unread" event.
+
+Cursors are timestamps rather than message ids because ChatConsumer
+broadcasts a message before it is saved, so clients only know its
+timestamp. For the same reason a message can be saved after its recipient
+has already read past it; such messages are not counted.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChatRooms, Messages
+
+# A participant's read cursor and unread counter, by role.
+READER_FIELDS = {
+    "employee": ("employee_read_at", "employee_unread"),
+    "employer": ("employer_read_at", "employer_unread"),
+}
+
+
+def room_group_name(room_id):
+    return f"chat_{room_id}"
+
+
+def unread_event(room):
+    """The "chat_unread" channel event for a room loaded with its participants."""
+    return {
+        "type": "chat_unread",
+        "room_id": room.id,
+        "unread": {
+            room.employee.username: room.employee_unread,
+            room.employer.username: room.employer_unread,
+        },
+        "read_at": {
+            room.employee.username: room.employee_read_at and room.employee_read_at.isoformat(),
+            room.employer.username: room.employer_read_at and room.employer_read_at.isoformat(),
+        },
+    }
+
+
+def _role(room, user_id):
+    if user_id == room.employee_id:
+        return "employee"
+    if user_id == room.employer_id:
+        return "employer"
+    return None
+
+
+def _locked_rooms(room_ids):
+    return ChatRooms.objects.select_for_update(of=("self",)).select_related("employee", "employer").filter(
+        id__in=room_ids
+    )
+
+
+def add_unread(messages):
+    """
+    Count newly saved `messages` against their recipients. Call inside the
+    transaction that saved them; returns a chat_unread event per room.
+    """
+    events = []
+    for room in _locked_rooms({message.room_id for message in messages}):
+        for message in messages:
+            if message.room_id != room.id:
+                continue
+            sender = _role(room, message.sender_id)
+            if sender is None:
+                continue
+            read_field, unread_field = READER_FIELDS["employer" if sender == "employee" else "employee"]
+            read_at = getattr(room, read_field)
+            if read_at is None or message.timestamp > read_at:
+                setattr(room, unread_field, getattr(room, unread_field) + 1)
+        room.save(update_fields=["employee_unread", "employer_unread"])
+        events.append(unread_event(room))
+    return events
+
+
+def mark_read(room_id, user_id, until=None):
+    """
+    Move `user_id`'s read cursor in the room forward to `until` (default:
+    now) and recount their unread messages. Returns the chat_unread event,
+    or None when the user is not a participant.
+
+    `until` comes from the client, so it is capped at now: a cursor in the
+    future would hide messages that have not been sent yet.
+    """
+    now = timezone.now()
+    until = min(until, now) if until else now
+    with transaction.atomic():
+        room = _locked_rooms([room_id]).first()
+        role = room and _role(room, user_id)
+        if role is None:
+            return None
+        read_field, unread_field = READER_FIELDS[role]
+        read_at = getattr(room, read_field)
+        if read_at is None or until > read_at:
+            read_at = until
+            setattr(room, read_field, read_at)
+        setattr(room, unread_field, Messages.objects.filter(room_id=room_id, timestamp__gt=read_at).exclude(
+            sender_id=user_id
+        ).count())
+        room.save(update_fields=[read_field, unread_field])
+    return unread_event(room)
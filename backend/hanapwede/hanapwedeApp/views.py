@@ -3,7 +3,11 @@ from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.hashers import make_password
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db import transaction
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
 from hanapwedeApp.models import EmployeeProfile,Notification , JobFairJobPost
 import json
 from django.contrib.auth import authenticate
@@ -19,9 +23,6 @@ from .serializer import EmployerProfileSerializer
 from .serializer import JobPostSerializer, ReportSerializerv2,PWDCardSerializer
 from .models import Tag, User, JobPost, DisabilityTag,Application
 from .serializer import TagSerializer, DisabilityTagSerializer,JobApplicationSerializer
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.authentication import TokenAuthentication
 from rest_framework import viewsets
@@ -53,11 +54,6 @@ from django.contrib.auth.tokens import PasswordResetTokenGenerator
 
 
 
-#OCR imports
-
-import easyocr
-from PIL import Image
-import numpy as np
 from django.http import JsonResponse
 
 from .tokens import email_verification_token
@@ -415,16 +411,91 @@ def user_has_profile(request, user_id):
 from rest_framework.decorators import permission_classes
 from rest_framework.permissions import IsAuthenticated
 from django.http import JsonResponse
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from .models import JobPost, User, EmployeeProfile
+import os
+from .models import JobPost, JobRecommendation, OCRJob, User, EmployeeProfile
+from . import instrumentation, ocr, ocr_jobs, result_cache, unread
+from .permissions import IsAdmin
+from .catalog import load_job_catalog, get_catalog_snapshot, paginate_job_catalog, PAGINATION_PARAMS
+from django.http import HttpResponse, HttpResponseNotModified
 
 @permission_classes([IsAuthenticated])
 def recommend_jobs(request):
     user_id = request.GET.get("user_id")
     debug_mode = request.GET.get("debug") == "true"
 
+    try:
+        limit = int(request.GET["limit"]) if request.GET.get("limit") else None
+        offset = int(request.GET.get("offset") or 0)
+    except ValueError:
+        return JsonResponse({"message": "limit and offset must be numbers"}, status=400)
+    if (limit is not None and limit < 0) or offset < 0:
+        return JsonResponse({"message": "limit and offset must not be negative"}, status=400)
+
+    # Rankings only change with the user's profile/preferences or the catalog.
+    cache_key = None
+    if not debug_mode and str(user_id).isdigit():
+        cache_key = result_cache.result_key(int(user_id), limit, offset)
+        cached = result_cache.results.get(cache_key)
+        if cached is not None:
+            content, total = cached
+            response = HttpResponse(content, content_type="application/json")
+            if total is not None:
+                response["X-Total-Count"] = total
+            return response
+
+    response = None
+    if settings.SERVE_PRECOMPUTED_RECOMMENDATIONS and cache_key is not None:
+        response = stored_recommendations(int(user_id), limit, offset)
+    if response is None:
+        response = rank_jobs(user_id, limit, offset, debug_mode)
+    if cache_key is not None and response.status_code == 200:
+        result_cache.results.set(cache_key, (response.content, response.get("X-Total-Count")))
+    return response
+
+
+def recommended_job_rows(ranking):
+    """Listing rows for (post_id, similarity_score, color) tuples, in order."""
+    jobs = {
+        job["post_id"]: job
+        for job in load_job_catalog(JobPost.objects.filter(post_id__in=[post_id for post_id, _, _ in ranking]))
+    }
+
+    rows = []
+    for post_id, similarity_score, color in ranking:
+        job = jobs.get(post_id)
+        if job is None:
+            continue
+        job["combined_text"] = (
+            f"{job['job_description']} {job['skills_required']} {job['tags']} "
+            f"{job['category'] or ''}, {job['disabilitytag']}"
+        )
+        job["similarity_score"] = similarity_score
+        job["color"] = color
+        rows.append(job)
+    return rows
+
+
+def stored_recommendations(user_id, limit, offset):
+    """
+    Ranking saved by the precompute_recommendations command, or None when the
+    user has none. X-Total-Count is the number of stored (top-K) rows.
+    """
+    stored = JobRecommendation.objects.filter(user_id=user_id).order_by("rank")
+    total = stored.count()
+    if not total:
+        return None
+    ranking = list(stored.values_list("job_post_id", "similarity_score", "color")[
+        offset:None if limit is None else offset + limit
+    ])
+    response = JsonResponse(recommended_job_rows(ranking), safe=False)
+    response["X-Total-Count"] = total
+    return response
+
+
+def rank_jobs(user_id, limit, offset, debug_mode):
+    # Imported here so that loading the URLconf does not load scikit-learn.
+    from . import recommender
+
     try:
         user = User.objects.get(id=user_id)
         emp_profile = EmployeeProfile.objects.get(user_id=user_id)
@@ -437,136 +508,58 @@ def recommend_jobs(request):
     user_disability = emp_profile.user_disability
     user_skills = emp_profile.skills
 
-    # All job posts
-    job_posts = JobPost.objects.all()
-    job_data = [
-        {
-            "post_id": job.post_id,
-            "job_title": job.job_title,
-            "job_description": job.job_desc,
-            "skills_required": job.skills_req or "",
-            "tags": ", ".join(tag.name for tag in job.tags.all()),
-            "disabilitytag": ", ".join(tag.name for tag in job.disabilitytag.all()),
-            "comp_name": job.get_company_name(),
-            "category": job.category,
-            "location": job.location,
-            "posted_by": job.posted_by.id if job.posted_by else None
-        }
-        for job in job_posts
-    ]
+    # TF-IDF similarity and filters against the persisted job index
+    job_index = recommender.get_current_job_index()
 
-    if not job_data:
+    if not len(job_index):
         return JsonResponse({"message": "No jobs found"}, status=404)
 
-    df = pd.DataFrame(job_data)
-    df["combined_text"] = (
-        df["job_description"] + " " +
-        df["skills_required"] + " " +
-        df["tags"] + " " +
-        df["category"] + ", " +
-        df["disabilitytag"]
-    )
-
-    # Create user profile text
-    user_profile = (
-        " ".join(preferred_tag_names) + " " +
-        " ".join(preferred_tag_names) + ", " +
-        user_disability + " " +
-        (user_skills + " ") * 2
+    similarity_scores, included, colors, disability_match = job_index.match(
+        preferred_tag_names, user_disability, user_skills
     )
+    post_ids = job_index.post_ids
 
-    # TF-IDF and similarity
-    tfidf_vectorizer = TfidfVectorizer(stop_words="english")
-    tfidf_matrix = tfidf_vectorizer.fit_transform(df["combined_text"])
-    user_vector = tfidf_vectorizer.transform([user_profile])
-    similarity_scores = cosine_similarity(user_vector, tfidf_matrix).flatten()
-    df["similarity_score"] = similarity_scores
-
-    # Filters
-    recommended_jobs = []
     debug_list = []
+    if debug_mode:
+        import numpy as np
 
-    user_disability_lower = user_disability.lower()
-    user_skills_list = [s.strip().lower() for s in user_skills.split(",")]
-    user_pref_tags_lower = [tag.lower() for tag in preferred_tag_names]
-
-    def semantic_skill_match(user_skills, job_skills):
-        if not user_skills or not job_skills:
-            return False
-    
-        all_skills = user_skills + job_skills
-        vectorizer = TfidfVectorizer().fit(all_skills)
-        vectors = vectorizer.transform(all_skills)
-
-        user_vecs = vectors[:len(user_skills)]
-        job_vecs = vectors[len(user_skills):]
-
-        similarity = cosine_similarity(user_vecs, job_vecs)
-        return similarity.max() > 0.5
-    
-    for idx, row in df.iterrows():
-        job_disabilities = row["disabilitytag"].lower().split(", ")
-        job_skills_required = [s.strip().lower() for s in row["skills_required"].split(",")] if row["skills_required"] else []
-        job_tags = row["tags"].lower().split(", ")
-
-        disability_match = any(user_disability_lower in jd or jd in user_disability_lower for jd in job_disabilities)
-        skill_match = semantic_skill_match(user_skills_list, job_skills_required)
-        pref_match = any(utag in jtag or jtag in utag for utag in user_pref_tags_lower for jtag in job_tags)
-
-        status = ""
-        reason = []
-
-        if not disability_match:
-            status = "Excluded"
-            reason.append("No disability match")
-        elif not skill_match and not pref_match:
-            status = "Excluded"
-            reason.append("No skill or preference match")
-        else:
-            status = "Included"
-        
-      
-
-        if status == "Included":
-            if skill_match and pref_match and disability_match:
-                color = "Green"
-            elif skill_match and disability_match:
-                color = "Yellow"
-            elif pref_match and disability_match:
-                color = "Red"
-            else:
-                color = "Uncategorized"
-            row_data = row.to_dict()
-            row_data["color"] = color
-            recommended_jobs.append(row_data)
-
-            print(f"[✔️ INCLUDED] Job ID {row['post_id']} - {row['job_title']}")
-        else:
-            print(f"[❌ EXCLUDED] Job ID {row['post_id']} - {row['job_title']} → Reason: {', '.join(reason)}")
-            color = "Excluded"  # Set this so it's available for debug output
-
-
-        if debug_mode:
-            debug_list.append({
-            "post_id": row["post_id"],
-            "job_title": row["job_title"],
-            "match_status": status if not reason else ", ".join(reason),
-            "similarity_score": row["similarity_score"],
-            "color": color
-        })
+        match_status = np.select(
+            [~disability_match, ~included],
+            ["No disability match", "No skill or preference match"],
+            "Included",
+        )
+        debug_jobs = load_job_catalog(fields=["post_id", "job_title"])
+        debug_rows = job_index.positions([job["post_id"] for job in debug_jobs]).tolist()
+        debug_list = [
+            {
+                "post_id": job["post_id"],
+                "job_title": job["job_title"],
+                "match_status": str(match_status[row]),
+                "similarity_score": float(similarity_scores[row]),
+                "color": str(colors[row]) if included[row] else "Excluded",
+            }
+            for job, row in zip(debug_jobs, debug_rows)
+            if row >= 0
+        ]
 
-    if recommended_jobs:
-        recommended_df = pd.DataFrame(recommended_jobs)
-        recommended_df["similarity_score"] = recommended_df["similarity_score"].astype(float)
-        top_recommendations = recommended_df.sort_values(by="similarity_score", ascending=False)
+    if included.any():
+        top = recommender.top_rows(
+            similarity_scores, included, post_ids, None if limit is None else offset + limit
+        )[offset:]
+        top_recommendations = recommended_job_rows([
+            (int(post_ids[row]), float(similarity_scores[row]), str(colors[row]))
+            for row in top.tolist()
+        ])
 
         if debug_mode:
-            return JsonResponse({
-                "recommended": top_recommendations.to_dict(orient="records"),
+            response = JsonResponse({
+                "recommended": top_recommendations,
                 "debug_info": debug_list
             }, safe=False)
-
-        return JsonResponse(top_recommendations.to_dict(orient="records"), safe=False)
+        else:
+            response = JsonResponse(top_recommendations, safe=False)
+        response["X-Total-Count"] = int(included.sum())
+        return response
     else:
         if debug_mode:
             return JsonResponse({
@@ -688,6 +681,77 @@ def employer_dashboard(request):
     })
 
 
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def job_candidates(request, post_id):
+    """Activated employees ranked for one of the employer's job posts."""
+    from . import candidates, recommender
+
+    job = JobPost.objects.filter(post_id=post_id).values("posted_by_id").first()
+    if job is None:
+        return JsonResponse({"message": "Job post not found"}, status=404)
+    if job["posted_by_id"] != request.user.id and not IsAdmin().has_permission(request, None):
+        return JsonResponse({"error": "Job post not found or unauthorized"}, status=403)
+
+    try:
+        limit = int(request.GET.get("limit") or candidates.PAGE_SIZE)
+        offset = int(request.GET.get("offset") or 0)
+    except ValueError:
+        return JsonResponse({"message": "limit and offset must be numbers"}, status=400)
+    if limit < 0 or offset < 0:
+        return JsonResponse({"message": "limit and offset must not be negative"}, status=400)
+    limit = min(limit, candidates.MAX_PAGE_SIZE)
+
+    job_index = recommender.get_current_job_index()
+    for attempt in range(2):
+        profile_index = candidates.get_current_profile_index()
+        try:
+            scores, included, colors = profile_index.match(job_index, post_id)
+        except KeyError:
+            return JsonResponse({"message": "Job post is not indexed yet"}, status=404)
+
+        top = recommender.top_rows(scores, included, profile_index.user_ids, offset + limit)[offset:]
+        user_ids = profile_index.user_ids[top].tolist()
+        profiles = {
+            profile["user_id"]: profile
+            for profile in EmployeeProfile.objects.filter(user_id__in=user_ids, activated=True).values(
+                "user_id", "full_name", "pro_headline", "role", "skills", "user_disability", "location"
+            )
+        }
+        gone = set(user_ids) - set(profiles)
+        if not gone or attempt:
+            break
+        # Deleted or deactivated without a signal (bulk update, raw SQL): drop them and rank again.
+        candidates.refresh_profiles(gone)
+
+    results = []
+    for user_id, row in zip(user_ids, top.tolist()):
+        profile = profiles.get(user_id)
+        if profile is None:
+            continue
+        profile["similarity_score"] = float(scores[row])
+        profile["color"] = str(colors[row])
+        results.append(profile)
+
+    response = JsonResponse(results, safe=False)
+    response["X-Total-Count"] = int(included.sum())
+    return response
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAdmin])
+def request_stats(request):
+    """Per-view request stats of this process over the last few minutes."""
+    return Response({
+        "enabled": settings.REQUEST_INSTRUMENTATION,
+        "pid": os.getpid(),
+        "window_minutes": instrumentation.stats.window_minutes,
+        "views": instrumentation.stats.snapshot(),
+    })
+
+
 # START OF FORUMS VIEWS
 
 class PostViewSet(viewsets.ModelViewSet):
@@ -823,28 +887,65 @@ def create_chat(request):
 
     return Response({"room_id": chat_room.id})
 
+CHAT_PAGE_SIZE = 50
+CHAT_MAX_PAGE_SIZE = 200
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_chat_messages(request, room_id):
+    """
+    The newest `limit` messages of the room, oldest first. ?before=<message id>
+    pages back through older ones ("load older"); ?after=<message id> returns
+    the ones saved since, to catch up after a reconnect. has_more says whether
+    another page exists in that direction; read_at has both participants'
+    read cursors.
+    """
     # Fetch the chat room
-    room = ChatRooms.objects.get(id=room_id)
+    room = ChatRooms.objects.select_related("employee", "employer").get(id=room_id)
     
     # Determine the other user in the chat room
     if room.employee == request.user:
         other_user = room.employer
     else:
         other_user = room.employee
-    
-    # Fetch the messages in the chat room
-    messages = Messages.objects.filter(room_id=room_id).order_by("timestamp")
-    
+
+    try:
+        limit = min(int(request.GET.get("limit") or CHAT_PAGE_SIZE), CHAT_MAX_PAGE_SIZE)
+        before = int(request.GET["before"]) if request.GET.get("before") else None
+        after = int(request.GET["after"]) if request.GET.get("after") else None
+    except ValueError:
+        return Response({"error": "limit, before and after must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+    if limit < 1:
+        return Response({"error": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+
+    messages = Messages.objects.filter(room_id=room_id)
+    fields = ("id", "sender__username", "content", "timestamp")
+    if after is not None:
+        # By id, not timestamp: saves are batched, so a message can be saved
+        # after a newer one and still has to show up in the next delta.
+        page = list(messages.filter(id__gt=after).order_by("id").values(*fields)[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+    else:
+        if before is not None:
+            anchor = messages.filter(id=before).values_list("timestamp", flat=True).first()
+            if anchor is None:
+                return Response({"error": "Message not found"}, status=status.HTTP_404_NOT_FOUND)
+            messages = messages.filter(Q(timestamp__lt=anchor) | Q(timestamp=anchor, id__lt=before))
+        page = list(messages.order_by("-timestamp", "-id").values(*fields)[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit][::-1]
+
     # Prepare the response with the other user's information
     response_data = {
         "other_user": {"username": other_user.username, "id": other_user.id},
         "messages": [
-            {"sender": msg.sender.username, "content": msg.content, "timestamp": msg.timestamp} 
-            for msg in messages
-        ]
+            {"id": msg["id"], "sender": msg["sender__username"], "content": msg["content"], "timestamp": msg["timestamp"]}
+            for msg in page
+        ],
+        "has_more": has_more,
+        "read_at": unread.unread_event(room)["read_at"],
     }
     
     return Response(response_data)
@@ -867,7 +968,11 @@ def send_message(request):
     except ChatRooms.DoesNotExist:
         return Response({"error": "Chat room not found."}, status=404)
 
-    message = Messages.objects.create(room=chat_room, sender=request.user, content=content)
+    with transaction.atomic():
+        message = Messages.objects.create(room=chat_room, sender=request.user, content=content)
+        events = unread.add_unread([message])
+    for event in events:
+        async_to_sync(get_channel_layer().group_send)(unread.room_group_name(chat_room.id), event)
 
     return Response({
         "message_id": message.id,
@@ -877,19 +982,45 @@ def send_message(request):
     }, status=201)
 
 
+INBOX_PAGE_SIZE = 50
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_chats(request):
+    """
+    The user's chat rooms, most recent activity first, `limit` at a time.
+    ?before=<room id> returns the page after that room. Each room carries its
+    latest message, so the whole page is one query.
+    """
     user = request.user
 
-    chat_rooms = ChatRooms.objects.filter(employee=user) | ChatRooms.objects.filter(employer=user)
+    try:
+        limit = min(int(request.GET.get("limit") or INBOX_PAGE_SIZE), CHAT_MAX_PAGE_SIZE)
+        before = int(request.GET["before"]) if request.GET.get("before") else None
+    except ValueError:
+        return Response({"error": "limit and before must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+    if limit < 1:
+        return Response({"error": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+
+    latest = Messages.objects.filter(room=OuterRef("pk")).order_by("-timestamp", "-id")
+    chat_rooms = ChatRooms.objects.filter(Q(employee=user) | Q(employer=user)).annotate(
+        last_message=Subquery(latest.values("content")[:1]),
+        last_timestamp=Subquery(latest.values("timestamp")[:1]),
+        # Rooms without messages sort by when they were opened.
+        activity=Coalesce("last_timestamp", "created_at"),
+    )
+    if before is not None:
+        anchor = chat_rooms.filter(id=before).values_list("activity", flat=True).first()
+        if anchor is None:
+            return Response({"error": "Chat room not found"}, status=status.HTTP_404_NOT_FOUND)
+        chat_rooms = chat_rooms.filter(Q(activity__lt=anchor) | Q(activity=anchor, id__lt=before))
+    page = list(chat_rooms.select_related("employee", "employer").order_by("-activity", "-id")[:limit + 1])
 
     chat_list = []
-    for chat in chat_rooms:
-        other_user = chat.employer if chat.employee == user else chat.employee  
-        last_message = chat.messages.last()  
+    for chat in page[:limit]:
+        other_user = chat.employer if chat.employee_id == user.id else chat.employee
 
-       
         profile_picture_url = None
         if other_user.profile_picture and hasattr(other_user.profile_picture, 'url'):
             profile_picture_url = str(other_user.profile_picture)
@@ -899,11 +1030,12 @@ def get_user_chats(request):
             "other_user": other_user.username,
             "other_user_profile_picture": profile_picture_url,
             "other_user_type": other_user.user_type,
-            "last_message": last_message.content if last_message else "No messages yet",
-            "last_timestamp": last_message.timestamp if last_message else None,
+            "last_message": chat.last_message if chat.last_timestamp else "No messages yet",
+            "last_timestamp": chat.last_timestamp,
+            "unread": chat.employee_unread if chat.employee_id == user.id else chat.employer_unread,
         })
 
-    return Response(chat_list)
+    return Response({"chats": chat_list, "has_more": len(page) > limit})
 
 
 
@@ -917,6 +1049,65 @@ def get_pending_users (request):
     return Response(serializer.data)
 
 
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAdmin])
+def pwd_card_checks(request):
+    """
+    Reads the latest PWD card of each pending user (or of ?user_ids=1,2) in
+    one batched OCR job and matches the ID numbers on it against ID_no.
+    Cards still being read come back as pending; call again to collect them.
+    """
+    profiles = EmployeeProfile.objects.filter(activated=False).order_by("user_id")
+    if request.GET.get("user_ids"):
+        try:
+            user_ids = [int(user_id) for user_id in request.GET["user_ids"].split(",")]
+        except ValueError:
+            return JsonResponse({"message": "user_ids must be numbers"}, status=400)
+        profiles = profiles.filter(user_id__in=user_ids)
+    profiles = list(profiles.values("user_id", "full_name", "ID_no")[:settings.OCR_BATCH_MAX_CARDS])
+
+    cards = {}
+    for card in PWDCard.objects.filter(user_id__in=[p["user_id"] for p in profiles]).order_by("-uploaded_at", "-id"):
+        cards.setdefault(card.user_id, card)
+    images = {}
+    for user_id, card in sorted(cards.items()):
+        try:
+            with card.image.open("rb") as f:
+                images[user_id] = f.read()
+        except (OSError, ValueError):
+            continue
+
+    try:
+        jobs = ocr_jobs.queue.submit_batch(list(images.values()))
+    except ocr_jobs.QueueFull:
+        response = JsonResponse({"error": "OCR is busy, please try again shortly."}, status=429)
+        response["Retry-After"] = 5
+        return response
+    except ocr_jobs.WorkersUnavailable:
+        response = JsonResponse({"error": "OCR is unavailable, please try again shortly."}, status=503)
+        response["Retry-After"] = 5
+        return response
+    fresh = OCRJob.objects.in_bulk([job.pk for job in jobs])
+    jobs = {user_id: fresh[job.pk] for user_id, job in zip(images, jobs)}
+
+    for profile in profiles:
+        card = cards.get(profile["user_id"])
+        job = jobs.get(profile["user_id"])
+        profile["card_id"] = card.id if card else None
+        if job is None:
+            profile["status"] = "no_card" if card is None else "missing_file"
+            continue
+        profile["job_id"] = str(job.pk)
+        profile["status"] = ocr_jobs.job_status(job)
+        if profile["status"] == "done":
+            profile["id_numbers"] = ocr.id_numbers(job.text)
+            profile["id_match"] = ocr.matches_id(profile["ID_no"], job.text)
+        elif profile["status"] == "failed":
+            profile["error"] = job.error or "OCR timed out"
+    return JsonResponse(profiles, safe=False)
+
+
 
 
 
@@ -963,53 +1154,31 @@ def get_preferences(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])  
 def get_all_jobs(request):
-    job_posts = JobPost.objects.all()
-
-    job_data = [
-        {
-            "post_id": job.post_id,
-            "job_title": job.job_title,
-            "job_description": job.job_desc,
-            "skills_required": job.skills_req if job.skills_req else "",
-            "tags": ", ".join(tag.name for tag in job.tags.all()),
-            "disabilitytag": ", ".join(tag.name for tag in job.disabilitytag.all()), 
-            "comp_name": job.get_company_name(),
-            "category": job.category,
-            "location": job.location,
-            "posted_by": job.posted_by.id if job.posted_by else None
-        }
-        for job in job_posts
-    ]
-
-    if not job_data:
-        return JsonResponse({"message": "No jobs found"}, status=404)
-
-    return JsonResponse(job_data, safe=False)
+    return job_catalog_response(request)
 
 @api_view(["GET"])
 def get_all_jobs_public(request):
-    job_posts = JobPost.objects.all()
-
-    job_data = [
-        {
-            "post_id": job.post_id,
-            "job_title": job.job_title,
-            "job_description": job.job_desc,
-            "skills_required": job.skills_req if job.skills_req else "",
-            "tags": ", ".join(tag.name for tag in job.tags.all()),
-            "disabilitytag": ", ".join(tag.name for tag in job.disabilitytag.all()), 
-            "comp_name": job.get_company_name(),
-            "category": job.category,
-            "location": job.location,
-            "posted_by": job.posted_by.id if job.posted_by else None
-        }
-        for job in job_posts
-    ]
+    return job_catalog_response(request)
+
 
-    if not job_data:
+def job_catalog_response(request):
+    if any(param in request.GET for param in PAGINATION_PARAMS):
+        try:
+            return JsonResponse(paginate_job_catalog(request.GET))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    snapshot = get_catalog_snapshot()
+
+    if not snapshot.count:
         return JsonResponse({"message": "No jobs found"}, status=404)
 
-    return JsonResponse(job_data, safe=False)
+    if snapshot.etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(snapshot.body, content_type="application/json")
+    response["ETag"] = snapshot.etag
+    return response
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -1153,20 +1322,48 @@ def platform_statistics(request):
 
 
 
-reader = easyocr.Reader(["en"])  # Load English model
-
 @csrf_exempt
 def ocr_view(request):
+    """
+    Queues the uploaded image for OCR; poll ocr_result with the returned job_id.
+    region=id_number reads only OCR_ID_NUMBER_REGION of the card, when set.
+    """
     if request.method == "POST" and request.FILES.get("image"):
-        image_file = request.FILES["image"]
-        image = Image.open(image_file)
-        image = np.array(image)
+        try:
+            job = ocr_jobs.queue.submit(
+                request.FILES["image"].read(), id_number_only=request.POST.get("region") == "id_number"
+            )
+        except ocr_jobs.QueueFull:
+            response = JsonResponse({"error": "OCR is busy, please try again shortly."}, status=429)
+            response["Retry-After"] = 5
+            return response
+        except ocr_jobs.WorkersUnavailable:
+            response = JsonResponse({"error": "OCR is unavailable, please try again shortly."}, status=503)
+            response["Retry-After"] = 5
+            return response
+
+        job.refresh_from_db()
+        return ocr_job_response(job, status=202)
 
-        text = reader.readtext(image, detail=0)  # Extract text
+    return JsonResponse({"error": "Invalid request"}, status=400)
 
-        return JsonResponse({"text": " ".join(text)})
 
-    return JsonResponse({"error": "Invalid request"}, status=400)
+def ocr_result(request, job_id):
+    try:
+        job = OCRJob.objects.get(pk=job_id)
+    except OCRJob.DoesNotExist:
+        return JsonResponse({"error": "OCR job not found"}, status=404)
+    return ocr_job_response(job)
+
+
+def ocr_job_response(job, status=200):
+    job_status = ocr_jobs.job_status(job)
+    data = {"job_id": str(job.pk), "status": job_status}
+    if job_status == "done":
+        data["text"] = job.text
+    elif job_status == "failed":
+        data["error"] = job.error or "OCR timed out"
+    return JsonResponse(data, status=status)
 
 
 @api_view(["PUT"])
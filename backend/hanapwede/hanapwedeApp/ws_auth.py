@@ -0,0 +1,38 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.authtoken.models import Token
+
+
+@database_sync_to_async
+def get_token_user(key):
+    token = Token.objects.select_related("user").filter(key=key).first()
+    if token is None or not token.user.is_active:
+        return AnonymousUser()
+    return token.user
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates websocket connections with the REST API's DRF tokens,
+    given as ?token=<key> (browsers cannot set headers on a websocket) or
+    an "Authorization: Token <key>" header. The user is looked up once, when
+    the connection opens, and kept in scope["user"]; AnonymousUser when the
+    token is missing or invalid.
+    """
+
+    async def __call__(self, scope, receive, send):
+        key = token_key(scope)
+        scope = dict(scope, user=await get_token_user(key) if key else AnonymousUser())
+        return await super().__call__(scope, receive, send)
+
+
+def token_key(scope):
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            keyword, _, key = value.decode("latin1").partition(" ")
+            if keyword == "Token" and key.strip():
+                return key.strip()
+    return parse_qs(scope.get("query_string", b"").decode("latin1")).get("token", [None])[0]
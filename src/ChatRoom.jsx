@@ -13,38 +13,96 @@ export default function ChatRoom() {
   const [error, setError] = useState(null)
   const messagesEndRef = useRef(null)
   const [otherUser,setOtherUser] = useState(null)
+  const [hasMore, setHasMore] = useState(false)
+  const [loadingOlder, setLoadingOlder] = useState(false)
+  // both participants' read cursors, pushed as chat_unread events
+  const [readAt, setReadAt] = useState({})
+  const messagesRef = useRef([])
+  const keepScrollRef = useRef(false)
   const authToken = localStorage.getItem("authToken")
   const username = localStorage.getItem("username")
 
 
   useEffect(() => {
+    messagesRef.current = messages
+    // older pages are added on top; stay where the user is reading
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false
+      return
+    }
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" })
   }, [messages]) 
 
-
-  useEffect(() => {
-    console.log(messages)
-  }, [messages])
-  useEffect(() => {
-    setIsLoading(true)
-    setError(null)
-
-    fetch(`${baseURL}/api/chat/messages/${roomId}/`, {
+  // one page of history: newest by default, or before/after a message id
+  const fetchMessages = (params = {}) =>
+    fetch(`${baseURL}/api/chat/messages/${roomId}/?${new URLSearchParams(params)}`, {
       method: "GET",
       headers: {
         Authorization: `Token ${authToken}`,
         "Content-Type": "application/json",
       },
+    }).then((response) => {
+      if (!response.ok) {
+        throw new Error("Failed to fetch chat history")
+      }
+      return response.json()
     })
-      .then((response) => {
-        if (!response.ok) {
-          throw new Error("Failed to fetch chat history")
+
+  const loadOlder = () => {
+    const firstId = messages.find((msg) => msg.id)?.id
+    if (!firstId || loadingOlder) return
+    setLoadingOlder(true)
+    fetchMessages({ before: firstId })
+      .then((data) => {
+        keepScrollRef.current = true
+        setMessages((prev) => [...data.messages, ...prev])
+        setHasMore(data.has_more)
+      })
+      .catch((error) => console.error("Error loading older messages:", error))
+      .finally(() => setLoadingOlder(false))
+  }
+
+  // after a reconnect, fetch only what was sent since the last saved message,
+  // page by page; after a long outage, reload the latest page instead
+  const catchUp = () => {
+    const lastId = [...messagesRef.current].reverse().find((msg) => msg.id)?.id
+    if (!lastId) return
+    const fetchSince = (afterId, delta, pagesLeft) =>
+      fetchMessages({ after: afterId, limit: 200 }).then((data) => {
+        delta = [...delta, ...data.messages]
+        if (!data.has_more) return delta
+        if (pagesLeft <= 1) return null
+        return fetchSince(data.messages[data.messages.length - 1].id, delta, pagesLeft - 1)
+      })
+    fetchSince(lastId, [], 5)
+      .then((delta) => {
+        if (delta) {
+          // live messages have no id yet; the delta has them as saved
+          setMessages((prev) => [...prev.filter((msg) => msg.id), ...delta])
+          return
         }
-        return response.json()
+        return fetchMessages().then((data) => {
+          setMessages(data.messages)
+          setHasMore(data.has_more)
+        })
       })
+      .catch((error) => console.error("Error catching up on messages:", error))
+  }
+
+
+  useEffect(() => {
+    console.log(messages)
+  }, [messages])
+  useEffect(() => {
+    setIsLoading(true)
+    setError(null)
+
+    fetchMessages()
       .then((data) => {
         setMessages(data.messages)
+        setHasMore(data.has_more)
         setOtherUser(data.other_user.username) 
+        setReadAt(data.read_at)
         setIsLoading(false)
       })
       .catch((error) => {
@@ -56,21 +114,53 @@ export default function ChatRoom() {
 
 
   useEffect(() => {
-    //const ws = new WebSocket(`ws://localhost:8000/ws/chat/${roomId}/`);     //LOCAL
-    const ws = new WebSocket(`wss://${window.location.host}/ws/chat/${roomId}/`); //PRODUCTION
-    setSocket(ws)
+    let ws
+    let retry
+    let closed = false
+    let reconnecting = false
 
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data)
-      setMessages((prev) => [...prev, { sender: data.sender, content: data.message }])
+    const connect = () => {
+      // browsers cannot send an Authorization header on a websocket
+      //ws = new WebSocket(`ws://localhost:8000/ws/chat/${roomId}/?token=${authToken}`);     //LOCAL
+      ws = new WebSocket(`wss://${window.location.host}/ws/chat/${roomId}/?token=${authToken}`); //PRODUCTION
+      setSocket(ws)
+
+      // tell the room this user has seen everything up to now
+      const acknowledgeRead = () => ws.send(JSON.stringify({ type: "read" }))
+
+      ws.onopen = () => {
+        if (reconnecting) catchUp()
+        acknowledgeRead()
+      }
+
+      ws.onmessage = (event) => {
+        const data = JSON.parse(event.data)
+        if (data.type === "chat_unread") {
+          setReadAt(data.read_at)
+          return
+        }
+        setMessages((prev) => [...prev, { sender: data.sender, content: data.message, timestamp: data.timestamp }])
+        if (data.sender !== username) acknowledgeRead()
+      }
+
+      ws.onclose = () => {
+        if (closed) return
+        reconnecting = true
+        retry = setTimeout(connect, 2000)
+      }
     }
+    connect()
 
-    return () => ws.close()
-  }, [roomId])
+    return () => {
+      closed = true
+      clearTimeout(retry)
+      ws.close()
+    }
+  }, [roomId, authToken])
 
   const sendMessage = () => {
     if (socket && message.trim()) {
-      const msgData = { message, sender: username }
+      const msgData = { message }
       socket.send(JSON.stringify(msgData))
       setMessage("")
     }
@@ -125,11 +215,26 @@ export default function ChatRoom() {
             <p className="text-center text-sm">Be the first to send a message!</p>
           </div>
         ) : (
-          messages.map((msg, idx) => {
+          <>
+          {hasMore && (
+            <div className="flex justify-center mb-4">
+              <button
+                onClick={loadOlder}
+                disabled={loadingOlder}
+                className="text-sm text-blue-600 hover:underline disabled:text-gray-400"
+              >
+                {loadingOlder ? "Loading..." : "Load older messages"}
+              </button>
+            </div>
+          )}
+          {messages.map((msg, idx) => {
             const isOwnMessage = msg.sender === username
+            const isSeen =
+              isOwnMessage && idx === messages.length - 1 && readAt[otherUser] && msg.timestamp &&
+              new Date(readAt[otherUser]) >= new Date(msg.timestamp)
 
             return (
-              <div key={idx} className={`mb-4 flex ${isOwnMessage ? "justify-end" : "justify-start"}`}>
+              <div key={msg.id ?? `live-${idx}`} className={`mb-4 flex ${isOwnMessage ? "justify-end" : "justify-start"}`}>
                 {!isOwnMessage && (
                   <div className="w-8 h-8 rounded-full bg-blue-500 flex items-center justify-center text-white text-sm font-medium mr-2 flex-shrink-0">
                     {getInitials(msg.sender)}
@@ -150,12 +255,14 @@ export default function ChatRoom() {
                   {msg.timestamp && (
                     <div className={`text-xs mt-1 ${isOwnMessage ? "text-right" : "text-left"} text-gray-500`}>
                       {formatTime(msg.timestamp)}
+                      {isSeen && " · Seen"}
                     </div>
                   )}
                 </div>
               </div>
             )
-          })
+          })}
+          </>
         )}
         <div ref={messagesEndRef} />
       </div>
@@ -62,7 +62,8 @@ export default function PwdCardOCR({ formData, setFormData, onFileChange }) {
         if (blob) {
           setError("");
           setImage(canvas.toDataURL()); 
-          processOCR(blob); 
+          // same bytes as the stored card, so the server's OCR cache matches
+          processOCR(file); 
       
 
         
@@ -113,7 +114,17 @@ export default function PwdCardOCR({ formData, setFormData, onFileChange }) {
         body: ocrFormData,
       });
   
-      const data = await response.json();
+      let data = await response.json();
+      if (!response.ok) throw new Error(data.error);
+
+      // OCR runs in the background, poll hanggang matapos
+      while (data.status === "pending") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const result = await fetch(`${baseURL}/api/ocr/${data.job_id}/`);
+        data = await result.json();
+      }
+      if (data.status !== "done") throw new Error(data.error);
+
       console.log("🔍 Extracted Text:", data.text);
   
       extractFields(data.text);
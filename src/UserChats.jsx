@@ -26,25 +26,31 @@ export default function UserChats() {
   const navigate = useNavigate()
 
 
-  useEffect(() => {
-    setIsLoading(true)
-    setError(null)
+  const [hasMore, setHasMore] = useState(false)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
 
-    fetch(`${baseURL}/api/user-chats/`, {
+  const fetchChats = (params = {}) =>
+    fetch(`${baseURL}/api/user-chats/?${new URLSearchParams(params)}`, {
       method: "GET",
       headers: {
         Authorization: `Token ${authToken}`,
         "Content-Type": "application/json",
       },
+    }).then((response) => {
+      if (!response.ok) {
+        throw new Error("Failed to fetch chat rooms")
+      }
+      return response.json()
     })
-      .then((response) => {
-        if (!response.ok) {
-          throw new Error("Failed to fetch chat rooms")
-        }
-        return response.json()
-      })
+
+  useEffect(() => {
+    setIsLoading(true)
+    setError(null)
+
+    fetchChats()
       .then((data) => {
-        setChats(data)
+        setChats(data.chats)
+        setHasMore(data.has_more)
         setIsLoading(false)
       })
       .catch((error) => {
@@ -54,6 +60,21 @@ export default function UserChats() {
       })
   }, [authToken])
 
+  const loadMore = () => {
+    if (!chats.length) return
+    setIsLoadingMore(true)
+    fetchChats({ before: chats[chats.length - 1].room_id })
+      .then((data) => {
+        setChats((prev) => [...prev, ...data.chats])
+        setHasMore(data.has_more)
+      })
+      .catch((error) => {
+        console.error("Error loading chats:", error)
+        setError("Failed to load your chats. Please try again.")
+      })
+      .finally(() => setIsLoadingMore(false))
+  }
+
  
   const filteredChats = chats.filter((chat) => chat.other_user.toLowerCase().includes(searchTerm.toLowerCase()))
 
@@ -185,7 +206,16 @@ export default function UserChats() {
                   <span className="text-xs">{chat.other_user_type}</span>
                 </div>
 
-                <p className="text-sm text-gray-600 truncate mt-1">{chat.last_message || "No messages yet"}</p>
+                <div className="flex justify-between items-center mt-1">
+                  <p className={`text-sm truncate ${chat.unread ? "font-semibold text-gray-900" : "text-gray-600"}`}>
+                    {chat.last_message || "No messages yet"}
+                  </p>
+                  {chat.unread > 0 && (
+                    <span className="ml-2 flex-shrink-0 rounded-full bg-blue-600 px-2 text-xs font-medium text-white">
+                      {chat.unread}
+                    </span>
+                  )}
+                </div>
               </div>
 
               {/* Arrow */}
@@ -194,6 +224,18 @@ export default function UserChats() {
           ))
         )}
       </div>
+
+      {hasMore && !isLoading && (
+        <div className="p-4 flex justify-center">
+          <button
+            onClick={loadMore}
+            disabled={isLoadingMore}
+            className="text-sm text-blue-600 hover:underline disabled:text-gray-400"
+          >
+            {isLoadingMore ? "Loading..." : "Load more conversations"}
+          </button>
+        </div>
+      )}
     </div>
     </div>
   )